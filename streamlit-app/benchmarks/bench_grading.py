@@ -0,0 +1,123 @@
+# benchmarks/bench_grading.py
+"""
+Micro-benchmarks of the code that grades a submitted answer.
+
+The workload replays answers to the bundled standard exercises: correct
+answers, answers with a typo, answers typed without accents and answers
+giving one of several glosses of a cell.
+
+    python benchmarks/bench_grading.py                  # run and compare to the baseline
+    python benchmarks/bench_grading.py --save-baseline  # store the results as the baseline
+    python benchmarks/bench_grading.py --compare        # exit 1 on a regression
+"""
+
+import os
+import random
+
+import harness
+
+import pandas as pd
+
+from utils.answer_index import AnswerIndex, parse_acceptable_answers
+from utils.helpers import LANGUAGE_OPTIONS, compare_strings, expand_parentheses, normalize_text
+
+SUITE = 'grading'
+
+# Standard exercises the workload is drawn from, with their (source, target) languages
+EXERCISES = {
+    'DutchEnglishFrequencySimplified.txt': ('Dutch', 'English'),
+    'SpanishEnglishFrequencySimplified.txt': ('Spanish', 'English'),
+    'TurkishEnglishFrequencySimplified.txt': ('Turkish', 'English'),
+}
+EXERCISES_DIR = os.path.join(harness.SRC_DIR, 'standard_exercises')
+
+# Answers per exercise and answer kind
+SAMPLES = 300
+TOLERANCE = 80
+
+
+def load_word_pairs(filename, languages):
+    df = pd.read_csv(os.path.join(EXERCISES_DIR, filename), sep='\t', header=None, names=list(languages))
+    return df.dropna().astype(str).to_dict('records')
+
+
+def with_typo(text, rng):
+    """'text' with one character replaced, dropped, doubled or swapped with the next."""
+    if len(text) < 2:
+        return text + 'x'
+    i = rng.randrange(len(text) - 1)
+    edit = rng.choice(('replace', 'drop', 'double', 'swap'))
+    if edit == 'replace':
+        return text[:i] + rng.choice('aeiounrst') + text[i + 1:]
+    if edit == 'drop':
+        return text[:i] + text[i + 1:]
+    if edit == 'double':
+        return text[:i] + text[i] + text[i:]
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def build_workload(seed=0):
+    """
+    Returns:
+        list: (user_input, answer cell, language code, answer kind) per simulated submit.
+    """
+    rng = random.Random(seed)
+    workload = []
+    for filename, languages in EXERCISES.items():
+        word_pairs = load_word_pairs(filename, languages)
+        for source, target in (languages, languages[::-1]):
+            code = LANGUAGE_OPTIONS[target]
+            cells = [pair[target] for pair in word_pairs]
+            accented = [cell for cell in cells if normalize_text(cell, code) != cell.lower()]
+            multi_gloss = [cell for cell in cells if len(parse_acceptable_answers(cell)) > 1]
+            for _ in range(SAMPLES):
+                cell = rng.choice(cells)
+                workload.append((rng.choice(parse_acceptable_answers(cell)), cell, code, 'correct'))
+                cell = rng.choice(cells)
+                workload.append((with_typo(rng.choice(parse_acceptable_answers(cell)), rng), cell, code, 'typo'))
+                if accented:
+                    cell = rng.choice(accented)
+                    answer = rng.choice(parse_acceptable_answers(cell))
+                    workload.append((normalize_text(answer, code), cell, code, 'accents'))
+                if multi_gloss:
+                    cell = rng.choice(multi_gloss)
+                    workload.append((parse_acceptable_answers(cell)[-1], cell, code, 'multi_gloss'))
+    rng.shuffle(workload)
+    return workload
+
+
+def run_benchmarks(names=None):
+    workload = build_workload()
+    index = AnswerIndex()
+    for _, cell, code, _ in workload:
+        index.candidates(cell, code)
+
+    benchmarks = {
+        'normalize_text': (normalize_text, [(user_input, code) for user_input, _, code, _ in workload]),
+        'expand_parentheses': (expand_parentheses, [(cell,) for _, cell, _, _ in workload]),
+        'parse_acceptable_answers': (parse_acceptable_answers, [(cell,) for _, cell, _, _ in workload]),
+        'compare_strings': (compare_strings, [
+            (user_input, cell, TOLERANCE, True) for user_input, cell, _, _ in workload
+        ]),
+    }
+    for grader in ('similarity', 'edit_distance'):
+        for kind in ('correct', 'typo', 'accents', 'multi_gloss'):
+            benchmarks[f'grade[{grader},{kind}]'] = (index.grade, [
+                (user_input, cell, TOLERANCE, True, grader, code)
+                for user_input, cell, code, answer_kind in workload if answer_kind == kind
+            ])
+
+    results = {}
+    for name, (function, calls) in benchmarks.items():
+        if names is None or name in names:
+            results[name] = harness.measure(function, calls)
+    if names is None or 'answer_index_build' in names:
+        word_pairs = load_word_pairs('DutchEnglishFrequencySimplified.txt', ('Dutch', 'English'))
+        results['answer_index_build'] = harness.measure_once(
+            lambda: AnswerIndex.build(word_pairs, ('Dutch', 'English'))
+        )
+    return results
+
+
+if __name__ == '__main__':
+    harness.main(SUITE, run_benchmarks, "Benchmarks of answer grading.")
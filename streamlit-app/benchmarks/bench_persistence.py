@@ -0,0 +1,203 @@
+# benchmarks/bench_persistence.py
+"""
+End-to-end benchmarks of saving and loading progress.
+
+Synthetic sessions are built through PracticeSession.setup_new_exercise and
+the update methods, then saved to and loaded from a LocalStorage database in
+a temporary directory, so nothing leaves the machine.
+
+    python benchmarks/bench_persistence.py                  # all scales
+    python benchmarks/bench_persistence.py 1k 10k           # some scales
+    python benchmarks/bench_persistence.py 'load[10k]'      # one step of one scale
+    python benchmarks/bench_persistence.py --save-baseline  # store the results as the baseline
+
+Each step reports ops/sec and 'p99_us', its fastest run. Repeatable steps
+also report the peak memory allocated during the step (in a separate run
+under tracemalloc, which slows it down); snapshots report the bytes stored.
+"""
+
+import atexit
+import json
+import os
+import random
+import shutil
+import tempfile
+import tracemalloc
+
+import harness
+
+# Keep the progress cache and database of the benchmark away from the app's own
+WORK_DIR = tempfile.mkdtemp(prefix='mnemosyne-bench-')
+atexit.register(shutil.rmtree, WORK_DIR, ignore_errors=True)
+os.environ['PROGRESS_CACHE_DIR'] = os.path.join(WORK_DIR, 'progress_cache')
+
+import pandas as pd  # noqa: E402
+
+from sections.practice_session import PracticeSession  # noqa: E402
+from utils.local_storage import LocalStorage  # noqa: E402
+from utils.progress_cache import ProgressFileReader  # noqa: E402
+from utils.progress_journal import journal_filename_for, progress_filename  # noqa: E402
+
+SUITE = 'persistence'
+
+# Name: (word pairs, answers)
+SCALES = {
+    '1k': (1000, 5000),
+    '10k': (10000, 50000),
+    '50k': (50000, 200000),
+}
+SOURCE, TARGET = 'Dutch', 'English'
+DIRECTIONS = (f"{SOURCE} to {TARGET}", f"{TARGET} to {SOURCE}")
+
+# Share of answers given in mistakes mode, and of answers that are wrong
+MISTAKES_SHARE = 0.2
+WRONG_SHARE = 0.3
+
+# Runs of the repeated steps
+REPEAT = 3
+
+
+def synthetic_words(count, rng):
+    """'count' distinct made-up words."""
+    syllables = ['ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'vo', 'zi', 'be', 'do', 'ge', 'ij', 'sch', 'aa']
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+
+def synthetic_exercise(word_count, rng):
+    source_words = synthetic_words(word_count, rng)
+    target_words = synthetic_words(word_count, rng)
+    rng.shuffle(target_words)
+    # Some cells have several glosses or optional parts, like the standard exercises
+    for i in range(0, word_count, 7):
+        target_words[i] = f"{target_words[i]}, {target_words[(i + 1) % word_count]}"
+    for i in range(3, word_count, 11):
+        target_words[i] = f"(the) {target_words[i]}"
+    return pd.DataFrame({SOURCE: source_words, TARGET: target_words})
+
+
+def answer(session, rng):
+    """Answer one question the way practice_logic() records it."""
+    direction = rng.choice(DIRECTIONS)
+    question_column, answer_column = session._direction_columns(direction)
+    mode = 'mistakes' if rng.random() < MISTAKES_SHARE and session.mistakes[direction] else 'practice'
+    pset = session.get_set(mode, direction)
+    word_pair = pset.word_list[rng.randrange(len(pset.word_list))]
+    correct = rng.random() >= WRONG_SHARE
+    user_input = word_pair[answer_column] if correct else word_pair[answer_column][::-1]
+    if mode == 'practice':
+        session.update_progress_practice(
+            direction, word_pair[question_column], user_input, word_pair[answer_column], correct, word_pair
+        )
+        if correct:
+            session.remove_from_mistakes(word_pair, direction)
+        else:
+            session.add_mistake(word_pair, direction)
+    else:
+        session.update_progress_mistakes(
+            direction, word_pair[question_column], user_input, word_pair[answer_column], correct, word_pair
+        )
+
+
+def stored_bytes(storage, folder_id):
+    return sum(len(storage.download_bytes(f['id'])) for f in storage.list_files_in_directory(folder_id))
+
+
+def load_session(storage, folder_id, exercise_name, all_sets=False):
+    """Load an exercise like the Main Menu does; with 'all_sets', read every lazily loaded set too."""
+    reader = ProgressFileReader(storage, folder_id)
+    index_file = progress_filename(exercise_name)
+    contents = reader.read_many([index_file, journal_filename_for(index_file)])
+    journal = contents[journal_filename_for(index_file)]
+    session = PracticeSession()
+    session.load_from_progress(
+        json.loads(contents[index_file]),
+        journal_text=journal.decode('utf-8') if journal else '',
+        shard_reader=reader
+    )
+    if all_sets:
+        for direction in DIRECTIONS:
+            session.practice_sets.get(direction)
+            session.mistakes_sets.get(direction)
+    return session
+
+
+def with_peak_memory(function):
+    """Run 'function()' under tracemalloc. Returns (its result, peak MB allocated)."""
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run_scale(scale, storage):
+    word_count, answer_count = SCALES[scale]
+    rng = random.Random(0)
+    df = synthetic_exercise(word_count, rng)
+    folder_id = storage.create_directory(f"bench-{scale}", storage.root_folder_id)
+    exercise_name = f"bench_{scale}"
+    results = {}
+
+    def setup():
+        session = PracticeSession()
+        session.setup_new_exercise(df, SOURCE, TARGET, exercise_name)
+        return session
+
+    results[f'setup[{scale}]'] = harness.measure_once(setup, REPEAT)
+    session, results[f'setup[{scale}]']['peak_mb'] = with_peak_memory(setup)
+
+    def record():
+        for _ in range(answer_count):
+            answer(session, rng)
+
+    results[f'record_answers[{scale}]'] = harness.measure_once(record, 1)
+
+    # The first save folds the whole history into a snapshot, rolling old entries up
+    results[f'first_save[{scale}]'] = harness.measure_once(
+        lambda: session.save_progress_data(storage, folder_id, async_save=False), 1
+    )
+
+    def save_snapshot():
+        session.request_snapshot()
+        session.save_progress_data(storage, folder_id, async_save=False)
+
+    results[f'save_snapshot[{scale}]'] = harness.measure_once(save_snapshot, REPEAT)
+    _, results[f'save_snapshot[{scale}]']['peak_mb'] = with_peak_memory(save_snapshot)
+    results[f'save_snapshot[{scale}]']['bytes'] = stored_bytes(storage, folder_id)
+
+    def save_journal():
+        answer(session, rng)
+        session.save_progress_data(storage, folder_id, async_save=False)
+
+    results[f'save_journal[{scale}]'] = harness.measure_once(save_journal, REPEAT)
+
+    for name, all_sets in (('load', False), ('load_all_sets', True)):
+        def load():
+            return load_session(storage, folder_id, exercise_name, all_sets)
+        results[f'{name}[{scale}]'] = harness.measure_once(load, REPEAT)
+        _, results[f'{name}[{scale}]']['peak_mb'] = with_peak_memory(load)
+
+    return results
+
+
+def run_benchmarks(names=None):
+    """Run the scales named in 'names', as a bare scale ('10k') or in a step ('load[10k]'); all if None."""
+    scales = list(SCALES)
+    if names:
+        scales = [scale for scale in SCALES if scale in names or any(n.endswith(f'[{scale}]') for n in names)]
+        names = [name for name in names if name not in SCALES]
+    storage = LocalStorage(os.path.join(WORK_DIR, 'progress.db'))
+    results = {}
+    for scale in scales:
+        for name, result in run_scale(scale, storage).items():
+            if not names or name in names:
+                results[name] = result
+    return results
+
+
+if __name__ == '__main__':
+    harness.main(SUITE, run_benchmarks, "End-to-end benchmarks of saving and loading progress.")
@@ -0,0 +1,181 @@
+# benchmarks/harness.py
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), 'src')
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, 'baselines')
+
+# The app imports its modules relative to src (e.g. 'from utils.helpers import ...')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# A result regresses if its ops/sec drops, or its p99 latency grows, by more than this share
+DEFAULT_THRESHOLD = 0.25
+
+# Further measurements a result may carry, where lower is better, with their units
+EXTRA_METRICS = {
+    'bytes': 'B',
+    'peak_mb': 'MB',
+}
+
+
+def measure(function, workload, repeat=5):
+    """
+    Call 'function(*args)' for every args tuple of 'workload', timing each
+    call. The workload is replayed 'repeat' times and the best round counts,
+    as in timeit, so background noise does not show up as a regression.
+    Garbage collection is off while timing.
+
+    Returns:
+        dict: The best 'ops_per_sec' and 'p99_us' (the 99th percentile
+        latency of a single call in microseconds) of the rounds.
+    """
+    clock = time.perf_counter_ns
+    rounds = []
+    with _gc_disabled():
+        for _ in range(repeat):
+            latencies = []
+            for args in workload:
+                start = clock()
+                function(*args)
+                latencies.append(clock() - start)
+            latencies.sort()
+            rounds.append((len(latencies) / (sum(latencies) / 1e9), latencies[max(int(len(latencies) * 0.99) - 1, 0)]))
+    return {
+        'ops_per_sec': round(max(ops for ops, _ in rounds), 1),
+        'p99_us': round(min(p99 for _, p99 in rounds) / 1000, 2),
+        'calls': len(workload),
+    }
+
+
+def measure_once(function, repeat=5):
+    """
+    Time 'function()' as a whole, for benchmarks of one larger operation.
+
+    Returns:
+        dict: 'ops_per_sec' of the fastest of 'repeat' runs and 'p99_us', that run's time.
+    """
+    timings = []
+    with _gc_disabled():
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            function()
+            timings.append(time.perf_counter_ns() - start)
+    fastest = min(timings)
+    return {
+        'ops_per_sec': round(1e9 / fastest, 2),
+        'p99_us': round(fastest / 1000, 2),
+        'calls': len(timings),
+    }
+
+
+@contextmanager
+def _gc_disabled():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def baseline_path(suite):
+    return os.path.join(BASELINES_DIR, f"{suite}.json")
+
+
+def load_baseline(suite):
+    try:
+        with open(baseline_path(suite), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(suite, results):
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    baseline = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(baseline_path(suite), 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Names of the benchmarks in 'results' that regressed against 'baseline'
+    by more than 'threshold'. Benchmarks missing from the baseline are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        slower = result['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold)
+        longer_tail = result['p99_us'] > base['p99_us'] * (1 + threshold)
+        larger = any(
+            metric in result and base.get(metric) and result[metric] > base[metric] * (1 + threshold)
+            for metric in EXTRA_METRICS
+        )
+        if slower or longer_tail or larger:
+            regressions.append(name)
+    return regressions
+
+
+def report(results, baseline=None):
+    """Print one line per benchmark, with the change against the baseline if there is one."""
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"{name:<{width}}  {result['ops_per_sec']:>12,.1f} ops/s  p99 {result['p99_us']:>10,.2f} us"
+        base = baseline['results'].get(name) if baseline else None
+        if base:
+            line += (f"  ({result['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%} ops/s, "
+                     f"{result['p99_us'] / base['p99_us'] - 1:+.0%} p99)")
+        for metric, unit in EXTRA_METRICS.items():
+            if metric in result:
+                line += f"  {result[metric]:,} {unit}"
+                if base and base.get(metric):
+                    line += f" ({result[metric] / base[metric] - 1:+.0%})"
+        print(line)
+
+
+def main(suite, run_benchmarks, description):
+    """
+    Command line entry point of a benchmark suite. 'run_benchmarks(names)'
+    returns {name: result} for the selected benchmark names (None for all).
+    Exits with status 1 if --compare finds a regression.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline.")
+    parser.add_argument('--compare', action='store_true', help="Fail if a result regressed against the baseline.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed regression as a share, e.g. 0.25 for 25%%.")
+    parser.add_argument('names', nargs='*', help="Benchmarks to run (default: all).")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.names or None)
+    baseline = load_baseline(suite)
+    report(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(suite, results)
+        print(f"Baseline saved to {baseline_path(suite)}")
+    if args.compare:
+        if baseline is None:
+            print(f"No baseline at {baseline_path(suite)}; run with --save-baseline first.")
+            sys.exit(1)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
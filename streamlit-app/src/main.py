@@ -5,9 +5,10 @@ import os
 import dotenv
 
 from sections.practice_session import PracticeSession
-from utils.google_drive import GoogleDriveManager
+from utils.storage import get_storage
 from utils.helpers import create_dir
 from utils.file_paths import add_project_to_path, ProjectPaths
+from utils.progress_prefetch import AUTO_RESUME, prefetched_result, start_prefetch
 from streamlit_cookies_controller import CookieController
 
 
@@ -34,8 +35,10 @@ create_dir(EXERCISES_DIR)
 if 'practice_session' not in st.session_state:
     st.session_state['practice_session'] = PracticeSession()
 
+# The storage backend (Google Drive unless PROGRESS_STORAGE says otherwise) is shared by
+# all sessions of this process. Pages find it under 'drive_manager'.
 if 'drive_manager' not in st.session_state:
-    st.session_state['drive_manager'] = GoogleDriveManager()
+    st.session_state['drive_manager'] = get_storage()
 
 def main():
     st.title("Vocabulary Practice App")
@@ -57,7 +60,8 @@ def main():
     main_progress_folder_id = os.getenv("MAIN_PROGRESS_FOLDER_ID", "")
 
     if not main_progress_folder_id:
-        main_progress_folder_id = st.secrets['other_variables']["MAIN_PROGRESS_FOLDER_ID"]
+        main_progress_folder_id = (st.session_state['drive_manager'].root_folder_id
+                                   or st.secrets['other_variables']["MAIN_PROGRESS_FOLDER_ID"])
 
     if not main_progress_folder_id:
         st.warning("Warning: MAIN_PROGRESS_FOLDER_ID is not set. Google Drive actions may fail.")
@@ -67,17 +71,27 @@ def main():
         drive_manager = st.session_state['drive_manager']
         st.session_state['username'] = username
 
-        # Check if user folder already exists
-        existing_folder_id = find_user_folder_id(drive_manager, main_progress_folder_id, username.strip())
+        # Resolved once per username; every answer causes a rerun of this page
+        folder_key = (main_progress_folder_id, username.strip())
+        if st.session_state.get('user_folder_key') == folder_key:
+            user_folder_id, created = st.session_state['user_folder_id'], False
+        else:
+            user_folder_id, created = resolve_user_folder(drive_manager, main_progress_folder_id, username.strip())
+            st.session_state['user_folder_key'] = folder_key
+            st.session_state['user_folder_id'] = user_folder_id
 
-        if existing_folder_id:
+        if user_folder_id and not created:
             # We found an existing folder => recognized user
             st.success(f"Welcome back, **{username}**! Glad to see you again.")
-            st.session_state['user_folder_id'] = existing_folder_id
+
+            # Fetch the latest progress in the background while the menu renders
+            if st.session_state.get('prefetch_folder_id') != user_folder_id:
+                st.session_state['progress_prefetch'] = start_prefetch(drive_manager, user_folder_id)
+                st.session_state['prefetch_folder_id'] = user_folder_id
+                if AUTO_RESUME:
+                    auto_resume(drive_manager, user_folder_id)
         else:
-            # Folder not found => new user => create folder
-            new_folder_id = create_user_folder(drive_manager, main_progress_folder_id, username.strip())
-            st.session_state['user_folder_id'] = new_folder_id
+            # Folder not found => new user => folder was created
             st.info(f"Hello **{username}**, good to have you here. "
                     "We’ve created a new folder for you. Let's get started practicing!")
             
@@ -88,30 +102,31 @@ def main():
             "We'll check Google Drive to see if you've visited before."
         )
 
-def find_user_folder_id(drive_manager, parent_folder_id, username):
-    """
-    Look for a folder in 'parent_folder_id' matching 'username'.
-    Returns the folder ID if found, otherwise None.
-    """
-    if not parent_folder_id:
-        return None
-
-    # List files in the main folder
-    files = drive_manager.list_files_in_directory(parent_folder_id)
-    for f in files:
-        # Check if the item is a folder with the user's name
-        if f['name'] == username and f['mimeType'] == 'application/vnd.google-apps.folder':
-            return f['id']
-    return None
+def auto_resume(drive_manager, user_folder_id):
+    """Load the exercise the user practiced last, unless this session already has one."""
+    practice_session = st.session_state['practice_session']
+    if practice_session.exercise_name:
+        return
+    prefetched = prefetched_result(st.session_state['progress_prefetch'], timeout=AUTO_RESUME_TIMEOUT)
+    if prefetched is None or prefetched.latest_exercise is None:
+        return
+    entry = prefetched.exercises[prefetched.latest_exercise]
+    progress_file = entry.get('progress_file', progress_filename(prefetched.latest_exercise))
+    reader = ProgressFileReader(drive_manager, user_folder_id, prefetched.files_for(prefetched.latest_exercise))
+    if load_progress_file(practice_session, reader, progress_file):
+        st.info(f"Resumed **{prefetched.latest_exercise}** where you left off.")
 
-def create_user_folder(drive_manager, parent_folder_id, username):
+def resolve_user_folder(drive_manager, parent_folder_id, username):
     """
-    Create a new Google Drive folder for the user in 'parent_folder_id'.
-    Returns the new folder ID.
+    Find the folder in 'parent_folder_id' matching 'username', creating it for new users.
+    Returns (folder ID or None, True if the folder was just created).
     """
     if not parent_folder_id:
-        return None
-    return drive_manager.create_directory(username, parent_folder_id)
+        return None, False
+
+    # Cached name lookup, falling back to a single name + folder-type query; safe against
+    # two reruns creating the same user's folder at once
+    return drive_manager.find_or_create_folder(parent_folder_id, username)
 
 # src/pages/1_Main_Menu.py
 
@@ -122,10 +137,15 @@ import traceback
 import pandas as pd
 
 from sections.practice_session import PracticeSession
-from utils.google_drive import GoogleDriveManager
 from utils.story_translation import create_word_list_from_story
+from utils.progress_journal import journal_filename_for, progress_filename
+from utils.progress_cache import ProgressFileReader
+from utils.progress_manifest import load_manifest, manifest_from_listing, update_manifest
 from standard_exercises.standard_exercise_definition import VocabList
 
+# Seconds the auto-resume waits for the login prefetch before showing the menu without it
+AUTO_RESUME_TIMEOUT = 10
+
 # If you want the same PREDEFINED_EXERCISES logic from main, just replicate or import them
 LANGUAGE_OPTIONS = {
     "English": "en",
@@ -169,21 +189,31 @@ def app():
 
     if choice == "Continue where you left off (if any)":
         if username and user_folder_id and drive_manager:
-            progress_files = drive_manager.list_files_in_directory(user_folder_id)
-            progress_json_files = [f for f in progress_files if f['name'].endswith('.json')]
-            if not progress_json_files:
+            exercises = load_manifest(drive_manager, user_folder_id)
+            if exercises is None:
+                # Folders from before the manifest existed: list once and seed a manifest
+                exercises = manifest_from_listing(drive_manager.list_files_in_directory(user_folder_id))
+                if exercises:
+                    update_manifest(drive_manager, user_folder_id, list(exercises.values()))
+
+            if not exercises:
                 st.info("No progress files found.")
             else:
-                selected_file = st.selectbox("Select progress file", [f['name'] for f in progress_json_files])
+                show_progress_overview(exercises)
+                selected_exercise = st.selectbox("Select progress file", sorted(exercises))
                 if st.button("Load Progress"):
-                    file_id = next((f['id'] for f in progress_json_files if f['name'] == selected_file), None)
-                    if file_id:
-                        local_download_path = f"temp_downloads/{selected_file}"
-                        drive_manager.download_file(file_id, local_download_path)
-                        with open(local_download_path, 'r') as f:
-                            progress_data = json.load(f)
-                        practice_session.load_from_progress(progress_data)
+                    entry = exercises[selected_exercise]
+                    progress_file = entry.get('progress_file', progress_filename(selected_exercise))
+                    # Served from the login prefetch if it covered this exercise
+                    prefetched = None
+                    if st.session_state.get('prefetch_folder_id') == user_folder_id:
+                        prefetched = prefetched_result(st.session_state.get('progress_prefetch'))
+                    preloaded = prefetched.files_for(selected_exercise) if prefetched else {}
+                    reader = ProgressFileReader(drive_manager, user_folder_id, preloaded)
+                    if load_progress_file(practice_session, reader, progress_file):
                         st.success("Progress loaded successfully!")
+                    else:
+                        st.error("The selected progress file could not be found.")
         else:
             st.warning("Username or Drive Manager is not set, cannot continue where you left off.")
 
@@ -235,6 +265,45 @@ def app():
                 del st.session_state['story_name']
                 st.success("Word list cleared.")
 
+def show_progress_overview(exercises):
+    """Render a summary table of the user's exercises from the manifest."""
+    rows = []
+    for name, entry in sorted(exercises.items()):
+        total = entry.get('total_words')
+        answered = entry.get('answered')
+        rows.append({
+            "Exercise": name,
+            "Languages": (f"{entry['source_language']} - {entry['target_language']}"
+                          if entry.get('source_language') else ""),
+            "Answered": f"{answered} / {total * 2}" if answered is not None and total else "",
+            "Correct": entry.get('correct', ""),
+            "Mistakes": entry.get('mistakes', ""),
+            "Last practiced": entry.get('last_modified', "")[:16].replace('T', ' '),
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+def read_progress_with_journal(reader, progress_file_name):
+    """
+    Read a progress snapshot together with the journal stored next to it, in one batch.
+    Returns (snapshot bytes or None, journal text or '' if the exercise has no journal yet).
+    """
+    journal_file_name = journal_filename_for(progress_file_name)
+    contents = reader.read_many([progress_file_name, journal_file_name])
+    journal = contents[journal_file_name]
+    return contents[progress_file_name], journal.decode('utf-8') if journal else ''
+
+def load_progress_file(practice_session, reader, progress_file_name):
+    """Load a stored exercise into the session. Returns False if its progress file does not exist."""
+    progress_bytes, journal_text = read_progress_with_journal(reader, progress_file_name)
+    if not progress_bytes:
+        return False
+    practice_session.load_from_progress(
+        json.loads(progress_bytes),
+        journal_text=journal_text,
+        shard_reader=reader
+    )
+    return True
+
 def upload_progress(practice_session):
     st.write("Upload your progress file to continue.")
     progress_file = st.file_uploader("Upload Progress File", type=['json'])
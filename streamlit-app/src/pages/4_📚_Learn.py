@@ -116,8 +116,12 @@ def app():
         fill_context_set_from_source(
             practice_session, context_set, selected_direction, selected_word_set
         )
-        # Save after initialization
-        practice_session.save_progress_data()
+        # Save after initialization; a no-op if the set was already in this state
+        practice_session.save_progress_data(
+            drive_manager=st.session_state.get("drive_manager"),
+            user_folder_id=st.session_state.get("user_folder_id"),
+            async_save=True,
+        )
 
     # Show progress
     pset = context_set
@@ -279,11 +283,12 @@ def app():
         with col2:
             if st.button("Download progress"):
                 # Save current progress data
-                progress_json = practice_session.save_progress_data(
+                practice_session.save_progress_data(
                     drive_manager=st.session_state.get("drive_manager"),
                     user_folder_id=st.session_state.get("user_folder_id"),
                     async_save=False,  # to ensure we have a local copy before download
                 )
+                progress_json = practice_session.export_progress_json()
                 # Download button
                 st.download_button(
                     label="Download Progress",
@@ -313,8 +318,10 @@ def fill_context_set_from_source(practice_session, context_set, direction, word_
 
     random.shuffle(context_set.word_list)
     context_set.current_index = 0
-    context_set.progress = []
+    context_set.clear_progress()
     context_set.last_feedback_message = None
+    # The reshuffled set cannot be expressed as journal events
+    practice_session.request_snapshot('context' if word_set == "full list" else 'mistakes_context', direction)
 
 
 def update_context_progress(
@@ -343,19 +350,17 @@ def update_context_progress(
         )
 
     # Record progress
-    pset.progress.append(
+    kind = "context" if word_set == "full list" else "mistakes_context"
+    practice_session.append_progress_entry(
+        kind,
+        direction,
         {
             "word": word_in_from_lang,
             "correct_translation": correct_translation,
             "correct": correct,
-        }
+        },
     )
 
-    pset.current_index += 1
-    # Clamp if needed
-    if pset.current_index > len(pset.word_list):
-        pset.current_index = len(pset.word_list)
-
     # Update mistakes context if incorrect
     if not correct and word_set == "mistakes":
         practice_session.add_mistakes_context(word_pair, direction)
@@ -4,10 +4,57 @@ from dataclasses import dataclass, field
 from datetime import datetime
 import random
 import json
-import pandas as pd
+import logging
 import os
-import concurrent.futures
-from googleapiclient.http import MediaFileUpload
+import time
+from functools import partial
+import pandas as pd
+
+from utils.progress_journal import ProgressJournal, event_id, progress_filename, journal_filename
+from utils.progress_schema import WordTable, PROGRESS_SCHEMA_VERSION
+from utils.answer_index import AnswerIndex
+from utils.edit_distance import DEFAULT_GRADER
+from utils.helpers import LANGUAGE_OPTIONS
+from utils.upload_scheduler import get_upload_scheduler
+from utils.progress_cache import ProgressFileReader, content_md5
+from utils.progress_manifest import update_manifest
+from utils.progress_shards import (
+    SHARDED_SCHEMA_VERSION, EXERCISE_SHARD, LISTS_SHARD, LazySetDict,
+    archive_filename, is_loaded, is_staged, remote_merge_count, set_shard_key, shard_filename,
+    stage_journal, stage_snapshot
+)
+
+logger = logging.getLogger(__name__)
+
+# Maps the set kind used in journal events to the PracticeSession attribute holding those sets
+SET_KINDS = {
+    'practice': 'practice_sets',
+    'mistakes': 'mistakes_sets',
+    'context': 'context_sets',
+    'mistakes_context': 'mistakes_context_sets',
+}
+
+# Maps the word lists that feed each set kind to the PracticeSession attribute holding them
+WORD_LIST_KINDS = {
+    'mistakes': 'mistakes',
+    'context': 'complete_context',
+    'mistakes_context': 'mistakes_context',
+}
+
+# Minimum number of seconds between manifest updates for journal-only saves
+MANIFEST_UPDATE_INTERVAL = 60
+
+# Once a set holds more than ROLLUP_THRESHOLD raw progress entries, a snapshot folds
+# all but the newest PROGRESS_WINDOW of them into per-word statistics
+PROGRESS_WINDOW = 100
+ROLLUP_THRESHOLD = 200
+
+# Set kinds whose answers are graded against the answer index, so regrade_answers() can grade them again
+GRADED_KINDS = ('practice', 'mistakes')
+
+# Set PROGRESS_ARCHIVE=1 to keep rolled up entries in cold archive files next to the shards
+ARCHIVE_ROLLED_UP = os.getenv("PROGRESS_ARCHIVE", "").lower() in ("1", "true", "yes")
+
 
 @dataclass
 class PracticeSet:
@@ -17,18 +64,111 @@ class PracticeSet:
     last_feedback_message: tuple = None
     practice_started: bool = False
 
+    # Aggregates over every answer, including the ones rolled up out of 'progress'
+    num_correct: int = 0
+    num_incorrect: int = 0
+    rolled_up: int = 0
+    word_stats: dict = field(default_factory=dict)
+    archive_chunks: int = 0
+
+    def __post_init__(self):
+        # Sets stored before the counters existed only have their raw entries
+        if not (self.num_correct or self.num_incorrect or self.rolled_up):
+            for entry in self.progress:
+                self._count(entry, 1)
+
+    @property
+    def num_answered(self):
+        return self.num_correct + self.num_incorrect
+
+    def _count(self, entry, sign):
+        if entry['correct']:
+            self.num_correct += sign
+        else:
+            self.num_incorrect += sign
+
+    def record_answer(self, entry):
+        """Append a progress entry and update the counters."""
+        self.progress.append(entry)
+        self._count(entry, 1)
+
+    def toggle_last_assessment(self):
+        """Flip the 'correct' status of the newest progress entry."""
+        last_entry = self.progress[-1]
+        self._count(last_entry, -1)
+        last_entry['correct'] = not last_entry['correct']
+        self._count(last_entry, 1)
+        # Assessed by hand, so a regrade leaves it alone
+        last_entry['assessed'] = True
+
+    def set_assessment(self, position, correct):
+        """Set the 'correct' status of the progress entry at 'position'."""
+        entry = self.progress[position]
+        if entry['correct'] != correct:
+            self._count(entry, -1)
+            entry['correct'] = correct
+            self._count(entry, 1)
+
+    def remove_answered(self, index):
+        """Remove the word at 'index' of the word list together with its progress entry."""
+        self.word_list.pop(index)
+        # Entries before the raw window have been rolled up and can no longer be removed
+        position = index - self.rolled_up
+        if 0 <= position < len(self.progress):
+            self._count(self.progress.pop(position), -1)
+
+    def clear_progress(self):
+        """Forget all answers, rolled up or not."""
+        self.progress = []
+        self.num_correct = 0
+        self.num_incorrect = 0
+        self.rolled_up = 0
+        self.word_stats = {}
+
+    def roll_up(self, key_of, window=PROGRESS_WINDOW):
+        """
+        Fold all but the newest 'window' progress entries into 'word_stats'.
+
+        'key_of' maps an entry to the key of its word. Each word keeps its number
+        of attempts and correct answers, when it was last seen and its current
+        streak of correct answers. The counters are not affected.
+
+        Returns:
+            list: The entries that were folded, oldest first.
+        """
+        folded = self.progress[:-window] if window else self.progress
+        if not folded:
+            return []
+        self.progress = self.progress[len(folded):]
+        self.rolled_up += len(folded)
+        for entry in folded:
+            stats = self.word_stats.setdefault(
+                key_of(entry), {'attempts': 0, 'correct': 0, 'last_seen': None, 'streak': 0}
+            )
+            stats['attempts'] += 1
+            if entry['correct']:
+                stats['correct'] += 1
+                stats['streak'] += 1
+            else:
+                stats['streak'] = 0
+            stats['last_seen'] = entry.get('timestamp') or stats['last_seen']
+        return folded
+
 @dataclass
 class PracticeSession:
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-
     # General Settings
     tolerance: int = 80
     ignore_accents: bool = False
+    # How answers are graded against the tolerance, see utils.edit_distance.GRADERS
+    grader: str = DEFAULT_GRADER
     source_language: str = 'Source'
     target_language: str = 'Target'
     exercise_name: str = ''
     exercise_df: pd.DataFrame = None
     original_word_list: list = field(default_factory=list)
+    word_table: WordTable = field(default_factory=WordTable)
+    # Acceptable answers of every word, parsed once per exercise (see AnswerIndex)
+    answer_index: AnswerIndex = field(default_factory=AnswerIndex, repr=False)
 
     # Mistakes are tracked by direction
     mistakes: dict = field(default_factory=dict)
@@ -46,13 +186,34 @@ class PracticeSession:
     pronounce_answer_text: str = ''
     pronounce_answer_lang: str = ''
 
+    # Persistence: events since the last snapshot, and whether the next save must write a snapshot
+    journal: ProgressJournal = field(default_factory=ProgressJournal)
+    snapshot_required: bool = True
+    manifest_updated_at: float = 0.0
+
+    # Sharded storage: shards changed since the last snapshot, the index entries of the
+    # stored shards, and the callable reading a shard file by name for lazy loads
+    dirty_shards: set = field(default_factory=set)
+    shard_index: dict = field(default_factory=dict)
+    shard_reader: object = field(default=None, repr=False)
+
+    # State of the last save (see _persisted_state()), and how many saves wrote or skipped work
+    saved_state: tuple = None
+    save_stats: dict = field(default_factory=lambda: {'written': 0, 'skipped': 0})
+    # remote_merge_count() of the exercise when this session last reloaded it
+    remote_merges_seen: int = 0
+    # The next snapshot replaces the stored exercise (a restart or an uploaded file) instead of merging with it
+    replace_stored: bool = False
+
     def setup_new_exercise(self, df, source_language, target_language, exercise_name):
         """Initialize a brand new exercise from a DataFrame."""
         self.exercise_df = df
         self.source_language = source_language
         self.target_language = target_language
         self.exercise_name = exercise_name
-        self.original_word_list = self.exercise_df.to_dict('records')
+        self.word_table = WordTable.from_records(self.exercise_df.to_dict('records'))
+        self.original_word_list = self.word_table.records()
+        self.answer_index = AnswerIndex.build(self.original_word_list, (source_language, target_language))
         self.practice_sets = {}
         self.mistakes_sets = {}
         self.context_sets = {}
@@ -62,10 +223,7 @@ class PracticeSession:
         self.complete_context = {}
 
         # Define all directions
-        directions = [
-            f"{self.source_language} to {self.target_language}",
-            f"{self.target_language} to {self.source_language}"
-        ]
+        directions = self._directions()
 
         for direction in directions:
             # Initialize Practice Sets
@@ -115,72 +273,183 @@ class PracticeSession:
             random.shuffle(mcset.word_list)
             self.mistakes_context_sets[direction] = mcset
 
+        # A new exercise starts a new journal on top of a fresh snapshot
+        self.journal.reset()
+        self.shard_index = {}
+        self.shard_reader = None
+        self.saved_state = None
+        self.request_snapshot()
+        # Progress stored under the same name belongs to the run being restarted
+        self.replace_stored = True
+
         # Optionally save progress now
         self.save_progress_data()
 
-    def load_from_progress(self, progress_data):
-        """Load entire practice state from a dictionary of progress data."""
+    def load_from_progress(self, progress_data, journal_text=None, shard_reader=None):
+        """
+        Load entire practice state from a dictionary of progress data.
+        Sharded index files, the normalized format and legacy files with inline
+        word pairs are all accepted.
+
+        For a sharded index, 'shard_reader' is called with a shard file name and
+        returns its content (or None); see ProgressFileReader. The word table
+        and word lists are read right away; each practice set is read the
+        first time it is accessed.
+
+        If 'journal_text' is given (the journal file stored next to the snapshot,
+        or '' if there is none), the events recorded on top of this snapshot are
+        replayed and later saves keep appending to the same journal. Without
+        it, as for a file the user uploaded, the next save replaces whatever
+        storage holds for the exercise.
+        """
         self.source_language = progress_data.get('source_language', 'Source')
         self.target_language = progress_data.get('target_language', 'Target')
         self.exercise_name = progress_data.get('exercise_name', 'Exercise')
         self.tolerance = progress_data.get('tolerance', 80)
         self.ignore_accents = progress_data.get('ignore_accents', False)
-        self.exercise_df = pd.DataFrame(progress_data.get('exercise_data', []))
-        self.original_word_list = self.exercise_df.to_dict('records')
-        self.mistakes = progress_data.get('mistakes', {})
-        self.mistakes_context = progress_data.get('mistakes_context', {})
-        self.complete_context = progress_data.get('complete_context', {})
+        self.grader = progress_data.get('grader', DEFAULT_GRADER)
+        self.dirty_shards = set()
 
-        directions = [
-            f"{self.source_language} to {self.target_language}",
-            f"{self.target_language} to {self.source_language}"
-        ]
+        schema_version = progress_data.get('schema_version', 1)
+        if schema_version >= SHARDED_SCHEMA_VERSION:
+            self._load_index(progress_data, shard_reader)
+        else:
+            if schema_version >= 2:
+                self.word_table = WordTable.from_dict(progress_data.get('words', {}))
+                self.exercise_df = pd.DataFrame(self.word_table.rows, columns=self.word_table.columns)
+                progress_data = self._decode_progress_data(progress_data)
+            else:
+                self.exercise_df = pd.DataFrame(progress_data.get('exercise_data', []))
+                self.word_table = WordTable.from_records(self.exercise_df.to_dict('records'))
+            self.original_word_list = self.word_table.records()
+            self.mistakes = progress_data.get('mistakes', {})
+            self.mistakes_context = progress_data.get('mistakes_context', {})
+            self.complete_context = progress_data.get('complete_context', {})
 
-        self.practice_sets = {}
-        self.mistakes_sets = {}
-        self.context_sets = {}
-        self.mistakes_context_sets = {}
+            for kind, attribute in SET_KINDS.items():
+                sets = {}
+                for direction in self._directions():
+                    set_data = progress_data.get(attribute, {}).get(direction, {})
+                    sets[direction] = self._set_from_data(kind, direction, set_data)
+                setattr(self, attribute, sets)
 
-        for direction in directions:
-            # Load Practice Sets
-            practice_data = progress_data.get('practice_sets', {}).get(direction, {})
-            self.practice_sets[direction] = PracticeSet(
-                word_list=practice_data.get('word_list', self.original_word_list.copy()),
-                progress=practice_data.get('progress', []),
-                current_index=practice_data.get('current_index', 0),
-                last_feedback_message=practice_data.get('last_feedback_message'),
-                practice_started=practice_data.get('practice_started', False)
-            )
+            # Nothing of a monolithic file exists as shards yet
+            self.shard_index = {}
+            self.shard_reader = None
+            self._mark_dirty()
 
-            # Load Mistakes Sets
-            mistakes_data = progress_data.get('mistakes_sets', {}).get(direction, {})
-            self.mistakes_sets[direction] = PracticeSet(
-                word_list=mistakes_data.get('word_list', self.mistakes.get(direction, []).copy()),
-                progress=mistakes_data.get('progress', []),
-                current_index=mistakes_data.get('current_index', 0),
-                last_feedback_message=mistakes_data.get('last_feedback_message'),
-                practice_started=mistakes_data.get('practice_started', False)
-            )
+        self.answer_index = AnswerIndex.build(self.original_word_list, (self.source_language, self.target_language))
 
-            # Load Context Sets
-            context_data = progress_data.get('context_sets', {}).get(direction, {})
-            self.context_sets[direction] = PracticeSet(
-                word_list=context_data.get('word_list', self.complete_context.get(direction, []).copy()),
-                progress=context_data.get('progress', []),
-                current_index=context_data.get('current_index', 0),
-                last_feedback_message=context_data.get('last_feedback_message'),
-                practice_started=context_data.get('practice_started', False)
-            )
+        # Replay the journal tail on top of the snapshot
+        snapshot_id = progress_data.get('snapshot_id')
+        base_snapshot_id = progress_data.get('base_snapshot_id')
+        folded_ids = progress_data.get('folded_event_ids', [])
+        self.journal.reset(snapshot_id, base_snapshot_id, folded_ids)
+        self.snapshot_required = True
+        self.saved_state = None
+        self.replace_stored = journal_text is None
+        if journal_text is not None and snapshot_id:
+            journal_snapshot_id, events = ProgressJournal.parse(journal_text)
+            if journal_snapshot_id != snapshot_id:
+                # A journal of the snapshot this one was compacted from may hold events another
+                # device wrote during the compaction; the rest is already folded into this snapshot
+                folded = set(folded_ids)
+                if base_snapshot_id and journal_snapshot_id == base_snapshot_id:
+                    events = [event for event in events if event_id(event) not in folded]
+                else:
+                    events = []
+            for event in events:
+                event.setdefault('id', event_id(event))
+                decoded = self._decode_event(event)
+                self._apply_event(decoded)
+                self._mark_event_dirty(decoded)
+                self.journal.append(event)
+            self.snapshot_required = False
+            # This is exactly what storage holds
+            self.saved_state = self._persisted_state()
 
-            # Load Mistakes Context Sets
-            mistakes_context_data = progress_data.get('mistakes_context_sets', {}).get(direction, {})
-            self.mistakes_context_sets[direction] = PracticeSet(
-                word_list=mistakes_context_data.get('word_list', self.mistakes_context.get(direction, []).copy()),
-                progress=mistakes_context_data.get('progress', []),
-                current_index=mistakes_context_data.get('current_index', 0),
-                last_feedback_message=mistakes_context_data.get('last_feedback_message'),
-                practice_started=mistakes_context_data.get('practice_started', False)
-            )
+    def _load_index(self, index, shard_reader):
+        """Load a sharded progress index; practice sets are read lazily through 'shard_reader'."""
+        if shard_reader is None:
+            raise ValueError("Sharded progress files can only be loaded together with their shards.")
+        self.shard_reader = shard_reader
+        self.shard_index = index.get('shards', {})
+
+        eager = self._read_shards([EXERCISE_SHARD, LISTS_SHARD])
+        exercise = eager[EXERCISE_SHARD] or {}
+        self.word_table = WordTable.from_dict(exercise.get('words', {}))
+        self.exercise_df = pd.DataFrame(self.word_table.rows, columns=self.word_table.columns)
+        self.original_word_list = self.word_table.records()
+
+        lists = eager[LISTS_SHARD] or {}
+        for attribute in WORD_LIST_KINDS.values():
+            setattr(self, attribute, {
+                d: self.word_table.decode_list(ids) for d, ids in lists.get(attribute, {}).items()
+            })
+
+        for kind, attribute in SET_KINDS.items():
+            prefix = set_shard_key(kind, '')
+            directions = list(self._directions())
+            for key in self.shard_index:
+                if key.startswith(prefix) and key[len(prefix):] not in directions:
+                    directions.append(key[len(prefix):])
+            setattr(self, attribute, LazySetDict(partial(self._load_set, kind), directions))
+
+    def _read_shard(self, key):
+        """Read and parse one shard of the loaded index. Returns None if it is not stored."""
+        return self._read_shards([key])[key]
+
+    def _read_shards(self, keys):
+        """
+        Read and parse several shards of the loaded index at once, if the shard
+        reader supports that (a 'read_many' method).
+        """
+        entries = {key: self.shard_index[key] for key in keys if key in self.shard_index}
+        shards = dict.fromkeys(keys)
+        if not entries or self.shard_reader is None:
+            return shards
+
+        filenames = [entry['file'] for entry in entries.values()]
+        if hasattr(self.shard_reader, 'read_many'):
+            contents = self.shard_reader.read_many(filenames)
+        else:
+            contents = {filename: self.shard_reader(filename) for filename in filenames}
+
+        for key, entry in entries.items():
+            data = contents.get(entry['file'])
+            if data is None:
+                logger.warning("Progress shard %s is missing.", entry['file'])
+                continue
+            shard = json.loads(data)
+            if shard.get('version') != entry.get('version'):
+                logger.warning("Progress shard %s is at version %s, the index expects %s.",
+                               entry['file'], shard.get('version'), entry.get('version'))
+            shards[key] = shard
+        return shards
+
+    def _load_set(self, kind, direction):
+        """Read the shard of a single practice set (LazySetDict loader)."""
+        set_data = self._read_shard(set_shard_key(kind, direction)) or {}
+        return self._set_from_data(kind, direction, self._decode_set_data(direction, set_data))
+
+    def _set_from_data(self, kind, direction, set_data):
+        """Build a PracticeSet from decoded set data, defaulting to a fresh set of that kind."""
+        if kind == 'practice':
+            default_words = self.original_word_list
+        else:
+            default_words = getattr(self, WORD_LIST_KINDS[kind]).get(direction, [])
+        return PracticeSet(
+            word_list=set_data.get('word_list', default_words.copy()),
+            progress=set_data.get('progress', []),
+            current_index=set_data.get('current_index', 0),
+            last_feedback_message=set_data.get('last_feedback_message'),
+            practice_started=set_data.get('practice_started', False),
+            num_correct=set_data.get('num_correct', 0),
+            num_incorrect=set_data.get('num_incorrect', 0),
+            rolled_up=set_data.get('rolled_up', 0),
+            word_stats=set_data.get('word_stats', {}),
+            archive_chunks=set_data.get('archive_chunks', 0)
+        )
 
     def reset_practice_progress(self, direction):
         """Reset the practice set for a given direction."""
@@ -188,10 +457,11 @@ class PracticeSession:
             pset = self.practice_sets[direction]
             pset.word_list = self.original_word_list.copy()
             random.shuffle(pset.word_list)
-            pset.progress = []
+            pset.clear_progress()
             pset.current_index = 0
             pset.last_feedback_message = None
             pset.practice_started = False
+            self.request_snapshot('practice', direction)
 
     def reset_mistakes_progress(self, direction):
         """Reset the mistakes set for a given direction."""
@@ -199,10 +469,11 @@ class PracticeSession:
             mset = self.mistakes_sets[direction]
             mset.word_list = self.mistakes[direction].copy()  # or [] if empty
             random.shuffle(mset.word_list)
-            mset.progress = []
+            mset.clear_progress()
             mset.current_index = 0
             mset.last_feedback_message = None
             mset.practice_started = False
+            self.request_snapshot('mistakes', direction)
 
     def reset_context_progress(self, direction):
         """Reset the complete context set for a given direction."""
@@ -210,10 +481,11 @@ class PracticeSession:
             cset = self.context_sets[direction]
             cset.word_list = self.complete_context.get(direction, []).copy()
             random.shuffle(cset.word_list)
-            cset.progress = []
+            cset.clear_progress()
             cset.current_index = 0
             cset.last_feedback_message = None
             cset.practice_started = False
+            self.request_snapshot('context', direction)
 
     def reset_mistakes_context_progress(self, direction):
         """Reset the mistakes context set for a given direction."""
@@ -221,127 +493,312 @@ class PracticeSession:
             mcset = self.mistakes_context_sets[direction]
             mcset.word_list = self.mistakes_context.get(direction, []).copy()
             random.shuffle(mcset.word_list)
-            mcset.progress = []
+            mcset.clear_progress()
             mcset.current_index = 0
             mcset.last_feedback_message = None
             mcset.practice_started = False
+            self.request_snapshot('mistakes_context', direction)
 
     def add_mistake(self, word_pair, direction):
         """Add a word pair to the mistakes list for the given direction."""
         if word_pair not in self.mistakes[direction]:
-            self.mistakes[direction].append(word_pair)
-            if direction in self.mistakes_sets:
-                self.mistakes_sets[direction].word_list.append(word_pair)
+            self._commit({'op': 'add_word', 'kind': 'mistakes', 'direction': direction, 'word_pair': word_pair})
 
     def remove_from_mistakes(self, word_pair, direction):
         """Remove a word pair from mistakes for the given direction."""
-        if word_pair in self.mistakes[direction]:
-            self.mistakes[direction].remove(word_pair)
-        if word_pair in self.mistakes_sets[direction].word_list:
-            self.mistakes_sets[direction].word_list.remove(word_pair)
+        if (word_pair in self.mistakes[direction]
+                or word_pair in self.mistakes_sets[direction].word_list):
+            self._commit({'op': 'remove_word', 'kind': 'mistakes', 'direction': direction, 'word_pair': word_pair})
 
     def add_context(self, word_pair, direction):
         """Add a word pair to the complete context list for the given direction."""
         if word_pair not in self.complete_context.setdefault(direction, []):
-            self.complete_context[direction].append(word_pair)
-            if direction in self.context_sets:
-                self.context_sets[direction].word_list.append(word_pair)
+            self._commit({'op': 'add_word', 'kind': 'context', 'direction': direction, 'word_pair': word_pair})
 
     def remove_context(self, word_pair, direction):
         """Remove a word pair from the complete context list for the given direction."""
-        if word_pair in self.complete_context.get(direction, []):
-            self.complete_context[direction].remove(word_pair)
-        if word_pair in self.context_sets.get(direction, PracticeSet()).word_list:
-            self.context_sets[direction].word_list.remove(word_pair)
+        if (word_pair in self.complete_context.get(direction, [])
+                or word_pair in self.context_sets.get(direction, PracticeSet()).word_list):
+            self._commit({'op': 'remove_word', 'kind': 'context', 'direction': direction, 'word_pair': word_pair})
 
     def add_mistakes_context(self, word_pair, direction):
         """Add a word pair to the mistakes context list for the given direction."""
         if word_pair not in self.mistakes_context.setdefault(direction, []):
-            self.mistakes_context[direction].append(word_pair)
-            if direction in self.mistakes_context_sets:
-                self.mistakes_context_sets[direction].word_list.append(word_pair)
+            self._commit({'op': 'add_word', 'kind': 'mistakes_context', 'direction': direction, 'word_pair': word_pair})
 
     def remove_mistakes_context(self, word_pair, direction):
         """Remove a word pair from the mistakes context list for the given direction."""
-        if word_pair in self.mistakes_context.get(direction, []):
-            self.mistakes_context[direction].remove(word_pair)
-        if word_pair in self.mistakes_context_sets.get(direction, PracticeSet()).word_list:
-            self.mistakes_context_sets[direction].word_list.remove(word_pair)
+        if (word_pair in self.mistakes_context.get(direction, [])
+                or word_pair in self.mistakes_context_sets.get(direction, PracticeSet()).word_list):
+            self._commit({'op': 'remove_word', 'kind': 'mistakes_context', 'direction': direction, 'word_pair': word_pair})
 
     def update_progress_practice(self, direction, question, user_input, answer, correct, current_word_pair):
         """Record practice progress for the given direction."""
-        pset = self.practice_sets.get(direction)
-        if pset:
-            pset.progress.append({
-                'question': question,
-                'your_answer': user_input,
-                'correct_answer': answer,
-                'correct': correct,
-                'timestamp': datetime.now().isoformat(),
-                'word_pair': current_word_pair
-            })
-            pset.current_index += 1
+        self._record_answer('practice', direction, question, user_input, answer, correct, current_word_pair)
 
     def update_progress_mistakes(self, direction, question, user_input, answer, correct, current_word_pair):
         """Record mistakes progress for the given direction."""
-        mset = self.mistakes_sets.get(direction)
-        if mset:
-            mset.progress.append({
-                'question': question,
-                'your_answer': user_input,
-                'correct_answer': answer,
-                'correct': correct,
-                'timestamp': datetime.now().isoformat(),
-                'word_pair': current_word_pair
-            })
-            mset.current_index += 1
+        self._record_answer('mistakes', direction, question, user_input, answer, correct, current_word_pair)
 
     def update_progress_context(self, direction, question, user_input, answer, correct, current_word_pair):
         """Record context practice progress for the given direction."""
-        cset = self.context_sets.get(direction)
-        if cset:
-            cset.progress.append({
-                'question': question,
-                'your_answer': user_input,
-                'correct_answer': answer,
-                'correct': correct,
-                'timestamp': datetime.now().isoformat(),
-                'word_pair': current_word_pair
-            })
-            cset.current_index += 1
+        self._record_answer('context', direction, question, user_input, answer, correct, current_word_pair)
 
     def update_progress_mistakes_context(self, direction, question, user_input, answer, correct, current_word_pair):
         """Record mistakes context progress for the given direction."""
-        mcset = self.mistakes_context_sets.get(direction)
-        if mcset:
-            mcset.progress.append({
-                'question': question,
-                'your_answer': user_input,
-                'correct_answer': answer,
-                'correct': correct,
-                'timestamp': datetime.now().isoformat(),
-                'word_pair': current_word_pair
+        self._record_answer('mistakes_context', direction, question, user_input, answer, correct, current_word_pair)
+
+    def append_progress_entry(self, kind, direction, entry):
+        """
+        Append a raw progress entry to the set of the given kind and advance it.
+        The index is clamped to the length of the word list.
+        """
+        pset = self.get_set(kind, direction)
+        if pset:
+            self._commit({
+                'op': 'answer',
+                'kind': kind,
+                'direction': direction,
+                'entry': entry,
+                'feedback': pset.last_feedback_message,
             })
-            mcset.current_index += 1
 
-    def _upload_in_background(self, drive_manager, user_folder_id, local_path):
-        """Internal method to handle file upload on a separate thread."""
-        if not drive_manager or not user_folder_id:
+    def change_last_assessment(self, kind, direction):
+        """
+        Toggle the 'correct' status of the last progress entry of a set.
+        Returns the updated entry, or None if there is nothing to change.
+        """
+        pset = self.get_set(kind, direction)
+        if not pset or not pset.progress:
+            return None
+        self._commit({'op': 'toggle_assessment', 'kind': kind, 'direction': direction})
+        return pset.progress[-1]
+
+    def remove_last_question(self, kind, direction):
+        """
+        Remove the most recently answered question from a set.
+        Returns the removed word pair, or None if there is nothing to remove.
+        """
+        pset = self.get_set(kind, direction)
+        if not pset or pset.current_index == 0:
+            return None
+        word_pair = pset.word_list[pset.current_index - 1]
+        self._commit({'op': 'remove_question', 'kind': kind, 'direction': direction})
+        return word_pair
+
+    def regrade_answers(self, kinds=GRADED_KINDS):
+        """
+        Grade every stored answer again with the current tolerance, accent
+        setting and grader, and update the mistakes lists for the practice
+        answers whose verdict changed. Answers assessed by hand keep their
+        verdict, as do answers already rolled up into word statistics.
+
+        Changed sets are rewritten by the next snapshot.
+
+        Returns:
+            dict: Number of answers 'checked' and 'changed', and of words
+            'added' to and 'removed' from the mistakes lists.
+        """
+        stats = {'checked': 0, 'changed': 0, 'added': 0, 'removed': 0}
+        for kind in kinds:
+            for direction in self._directions():
+                pset = self.get_set(kind, direction)
+                if not pset or not pset.progress:
+                    continue
+                positions = [i for i, entry in enumerate(pset.progress) if not entry.get('assessed')]
+                _, answer_column = self._direction_columns(direction)
+                verdicts = self.answer_index.grade_many(
+                    [(pset.progress[i]['your_answer'], pset.progress[i]['correct_answer']) for i in positions],
+                    self.tolerance, self.ignore_accents, self.grader, LANGUAGE_OPTIONS.get(answer_column)
+                )
+                changed = [i for i, correct in zip(positions, verdicts) if pset.progress[i]['correct'] != correct]
+                stats['checked'] += len(positions)
+                if not changed:
+                    continue
+                for i in changed:
+                    pset.set_assessment(i, not pset.progress[i]['correct'])
+                stats['changed'] += len(changed)
+                self.request_snapshot(kind, direction)
+                if kind == 'practice':
+                    self._update_mistakes_after_regrade(pset, direction, changed, stats)
+        return stats
+
+    def _update_mistakes_after_regrade(self, pset, direction, changed, stats):
+        """
+        Add or remove the words whose latest practice answer changed verdict, as
+        practice_logic() does. The lists are updated in one pass and written by
+        the next snapshot rather than journaled word by word.
+        """
+        latest = {}
+        for i, entry in enumerate(pset.progress):
+            latest[self._word_key(entry)] = i
+        added, removed = {}, set()
+        for i in changed:
+            entry = pset.progress[i]
+            key = self._word_key(entry)
+            if latest[key] != i or 'word_pair' not in entry:
+                continue
+            if entry['correct']:
+                removed.add(key)
+            else:
+                added[key] = entry['word_pair']
+        if not (added or removed):
             return
-        filename = os.path.basename(local_path)
-        existing_file_id = drive_manager.get_file_id_by_name(user_folder_id, filename)
-        media = MediaFileUpload(local_path, mimetype='application/json', resumable=True)
-
-        if existing_file_id:
-            # Update existing file
-            drive_manager.service.files().update(
-                fileId=existing_file_id,
-                media_body=media,
-                fields='id'
-            ).execute()
+
+        def without_removed(words):
+            return [word_pair for word_pair in words if self._word_key({'word_pair': word_pair}) not in removed]
+
+        def with_added(words):
+            present = {self._word_key({'word_pair': word_pair}) for word_pair in words}
+            return words + [word_pair for key, word_pair in added.items() if key not in present]
+
+        mistakes = self.mistakes.setdefault(direction, [])
+        kept = without_removed(mistakes)
+        self.mistakes[direction] = with_added(kept)
+        stats['removed'] += len(mistakes) - len(kept)
+        stats['added'] += len(self.mistakes[direction]) - len(kept)
+        mset = self.mistakes_sets.get(direction)
+        if mset:
+            mset.word_list = with_added(without_removed(mset.word_list))
+        self.request_snapshot('mistakes', direction)
+        self.dirty_shards.add(LISTS_SHARD)
+
+    def set_feedback(self, kind, direction, feedback_message):
+        """Set the feedback message shown above the next question of a set."""
+        if self.get_set(kind, direction):
+            self._commit({'op': 'feedback', 'kind': kind, 'direction': direction, 'feedback': feedback_message})
+
+    def get_set(self, kind, direction):
+        """Return the PracticeSet of the given kind ('practice', 'mistakes', ...) for a direction."""
+        return getattr(self, SET_KINDS[kind]).get(direction)
+
+    def request_snapshot(self, kind=None, direction=None):
+        """
+        Make the next save write a snapshot instead of appending to the journal.
+
+        The snapshot rewrites the shard of the given set (all directions if no
+        direction is given) on top of whatever else changed; without arguments
+        every shard is rewritten.
+        """
+        self.snapshot_required = True
+        self._mark_dirty(kind, direction)
+
+    def _directions(self):
+        return [
+            f"{self.source_language} to {self.target_language}",
+            f"{self.target_language} to {self.source_language}"
+        ]
+
+    def _shard_keys(self):
+        """Keys of all shards of this session. Listing them never loads a lazy set."""
+        keys = [EXERCISE_SHARD, LISTS_SHARD]
+        for kind, attribute in SET_KINDS.items():
+            keys.extend(set_shard_key(kind, direction) for direction in getattr(self, attribute).keys())
+        return keys
+
+    def _mark_dirty(self, kind=None, direction=None):
+        if kind is None:
+            self.dirty_shards.update(self._shard_keys())
+        elif direction is None:
+            self.dirty_shards.update(set_shard_key(kind, d) for d in getattr(self, SET_KINDS[kind]).keys())
         else:
-            # Create a new file
-            drive_manager.upload_file_to_directory(local_path, user_folder_id, mime_type='application/json')
+            self.dirty_shards.add(set_shard_key(kind, direction))
+
+    def _mark_event_dirty(self, event):
+        """Mark the shards a journal event changes."""
+        self.dirty_shards.add(set_shard_key(event['kind'], event['direction']))
+        if event['op'] in ('add_word', 'remove_word'):
+            self.dirty_shards.add(LISTS_SHARD)
+
+    def _record_answer(self, kind, direction, question, user_input, answer, correct, current_word_pair):
+        self.append_progress_entry(kind, direction, {
+            'question': question,
+            'your_answer': user_input,
+            'correct_answer': answer,
+            'correct': correct,
+            'timestamp': datetime.now().isoformat(),
+            'word_pair': current_word_pair
+        })
+
+    def _commit(self, event):
+        """Apply a mutation to the session and record it in the journal."""
+        self._apply_event(event)
+        self._mark_event_dirty(event)
+        self.journal.append(self._encode_event(event))
+
+    def _direction_columns(self, direction):
+        """Return the (question, answer) word pair columns for a direction."""
+        if direction == f"{self.source_language} to {self.target_language}":
+            return self.source_language, self.target_language
+        return self.target_language, self.source_language
+
+    def _encode_event(self, event):
+        """Replace the word pairs in an event by their word table ids."""
+        encoded = dict(event)
+        if 'word_pair' in encoded:
+            encoded['word_pair'] = self.word_table.encode(encoded['word_pair'])
+        if 'entry' in encoded:
+            encoded['entry'] = self.word_table.encode_entry(
+                encoded['entry'], *self._direction_columns(encoded['direction'])
+            )
+        return encoded
+
+    def _decode_event(self, event):
+        """Inverse of _encode_event()."""
+        decoded = dict(event)
+        if 'word_pair' in decoded:
+            decoded['word_pair'] = self.word_table.decode(decoded['word_pair'])
+        if 'entry' in decoded:
+            decoded['entry'] = self.word_table.decode_entry(
+                decoded['entry'], *self._direction_columns(decoded['direction'])
+            )
+        return decoded
+
+    def _apply_event(self, event):
+        """Apply a single journal event. Used both for live mutations and for replay."""
+        op = event['op']
+        kind = event['kind']
+        direction = event['direction']
+        sets = getattr(self, SET_KINDS[kind])
+
+        if op == 'answer':
+            pset = sets.get(direction)
+            if pset:
+                pset.record_answer(event['entry'])
+                pset.current_index = min(pset.current_index + 1, len(pset.word_list))
+                pset.last_feedback_message = event.get('feedback')
+
+        elif op == 'add_word':
+            word_pair = event['word_pair']
+            words = getattr(self, WORD_LIST_KINDS[kind]).setdefault(direction, [])
+            if word_pair not in words:
+                words.append(word_pair)
+                if direction in sets:
+                    sets[direction].word_list.append(word_pair)
+
+        elif op == 'remove_word':
+            word_pair = event['word_pair']
+            words = getattr(self, WORD_LIST_KINDS[kind]).get(direction, [])
+            if word_pair in words:
+                words.remove(word_pair)
+            if word_pair in sets.get(direction, PracticeSet()).word_list:
+                sets[direction].word_list.remove(word_pair)
+
+        elif op == 'toggle_assessment':
+            pset = sets.get(direction)
+            if pset and pset.progress:
+                pset.toggle_last_assessment()
+
+        elif op == 'remove_question':
+            pset = sets.get(direction)
+            if pset and pset.current_index > 0:
+                pset.remove_answered(pset.current_index - 1)
+                pset.current_index -= 1
+
+        elif op == 'feedback':
+            pset = sets.get(direction)
+            if pset:
+                pset.last_feedback_message = event['feedback']
 
     def setup_context_sets(self):
         """
@@ -350,10 +807,7 @@ class PracticeSession:
         """
         self.context_sets = {}
         self.mistakes_context_sets = {}
-        directions = [
-            f"{self.source_language} to {self.target_language}",
-            f"{self.target_language} to {self.source_language}"
-        ]
+        directions = self._directions()
         for direction in directions:
             # Initialize Context Sets
             cset = PracticeSet(
@@ -377,87 +831,304 @@ class PracticeSession:
             random.shuffle(mcset.word_list)
             self.mistakes_context_sets[direction] = mcset
 
+        self.request_snapshot('context')
+        self.request_snapshot('mistakes_context')
         self.save_progress_data()
 
-    def save_progress_data(self, drive_manager=None, user_folder_id=None, async_save=True):
+    def build_progress_data(self):
         """
-        Serializes the current session into JSON and optionally uploads to Google Drive.
+        Build the full snapshot of the current session as a dictionary.
+
+        Word pairs are stored once in 'words'; word lists, mistakes and progress
+        entries refer to them by id.
         """
+        table = self.word_table
         progress_data = {
+            'schema_version': PROGRESS_SCHEMA_VERSION,
+            'snapshot_id': self.journal.snapshot_id,
             'source_language': self.source_language,
             'target_language': self.target_language,
             'exercise_name': self.exercise_name,
             'tolerance': self.tolerance,
             'ignore_accents': self.ignore_accents,
-            'exercise_data': self.exercise_df.to_dict('records') if self.exercise_df is not None else [],
-            'mistakes': self.mistakes,
-            'mistakes_context': self.mistakes_context,
-            'complete_context': self.complete_context,
+            'grader': self.grader,
+            'words': table.to_dict(),
+            **self._encode_word_lists(),
             'practice_sets': {},
             'mistakes_sets': {},
             'context_sets': {},
             'mistakes_context_sets': {}
         }
 
-        # Fill practice_sets data
-        for direction, pset in self.practice_sets.items():
-            progress_data['practice_sets'][direction] = {
-                'word_list': pset.word_list,
-                'progress': pset.progress,
-                'current_index': pset.current_index,
-                'last_feedback_message': pset.last_feedback_message,
-                'practice_started': pset.practice_started
-            }
+        for kind, attribute in SET_KINDS.items():
+            for direction, pset in getattr(self, attribute).items():
+                progress_data[attribute][direction] = self._encode_set_data(direction, pset)
 
-        # Fill mistakes_sets data
-        for direction, mset in self.mistakes_sets.items():
-            progress_data['mistakes_sets'][direction] = {
-                'word_list': mset.word_list,
-                'progress': mset.progress,
-                'current_index': mset.current_index,
-                'last_feedback_message': mset.last_feedback_message,
-                'practice_started': mset.practice_started
-            }
+        return progress_data
 
-        # Fill context_sets data
-        for direction, cset in self.context_sets.items():
-            progress_data['context_sets'][direction] = {
-                'word_list': cset.word_list,
-                'progress': cset.progress,
-                'current_index': cset.current_index,
-                'last_feedback_message': cset.last_feedback_message,
-                'practice_started': cset.practice_started
-            }
+    def _encode_word_lists(self):
+        table = self.word_table
+        return {
+            attribute: {d: table.encode_list(words) for d, words in getattr(self, attribute).items()}
+            for attribute in ('mistakes', 'mistakes_context', 'complete_context')
+        }
+
+    def _encode_set_data(self, direction, pset):
+        table = self.word_table
+        columns = self._direction_columns(direction)
+        return {
+            'word_list': table.encode_list(pset.word_list),
+            'progress': [table.encode_entry(entry, *columns) for entry in pset.progress],
+            'current_index': pset.current_index,
+            'last_feedback_message': pset.last_feedback_message,
+            'practice_started': pset.practice_started,
+            'num_correct': pset.num_correct,
+            'num_incorrect': pset.num_incorrect,
+            'rolled_up': pset.rolled_up,
+            'word_stats': pset.word_stats,
+            'archive_chunks': pset.archive_chunks
+        }
+
+    def _decode_set_data(self, direction, set_data):
+        table = self.word_table
+        columns = self._direction_columns(direction)
+        set_data = dict(set_data)
+        if 'word_list' in set_data:
+            set_data['word_list'] = table.decode_list(set_data['word_list'])
+        set_data['progress'] = [table.decode_entry(entry, *columns) for entry in set_data.get('progress', [])]
+        return set_data
 
-        # Fill mistakes_context_sets data
-        for direction, mcset in self.mistakes_context_sets.items():
-            progress_data['mistakes_context_sets'][direction] = {
-                'word_list': mcset.word_list,
-                'progress': mcset.progress,
-                'current_index': mcset.current_index,
-                'last_feedback_message': mcset.last_feedback_message,
-                'practice_started': mcset.practice_started
+    def _decode_progress_data(self, progress_data):
+        """Expand the word ids of a normalized snapshot back into word pairs."""
+        table = self.word_table
+        decoded = dict(progress_data)
+        for key in WORD_LIST_KINDS.values():
+            decoded[key] = {d: table.decode_list(ids) for d, ids in progress_data.get(key, {}).items()}
+        for attribute in SET_KINDS.values():
+            decoded[attribute] = {
+                direction: self._decode_set_data(direction, set_data)
+                for direction, set_data in progress_data.get(attribute, {}).items()
             }
+        return decoded
 
-        # Convert to JSON
-        progress_json = json.dumps(progress_data, ensure_ascii=False)
-
-        # If we have a Drive manager & folder, store in a temp path and upload
-        if drive_manager and user_folder_id:
-            filename = f"{self.exercise_name}_progress.json"
-            os.makedirs("temp_progress", exist_ok=True)
-            local_path = os.path.join("temp_progress", filename)
-            with open(local_path, "w", encoding="utf-8") as f:
-                f.write(progress_json)
-
-            if async_save:
-                self.executor.submit(
-                    self._upload_in_background,
-                    drive_manager,
-                    user_folder_id,
-                    local_path
-                )
-            else:
-                self._upload_in_background(drive_manager, user_folder_id, local_path)
+    def _build_shard(self, key):
+        """Content of a single shard."""
+        if key == EXERCISE_SHARD:
+            return {'words': self.word_table.to_dict()}
+        if key == LISTS_SHARD:
+            return self._encode_word_lists()
+        kind, direction = key.split('/', 1)
+        return self._encode_set_data(direction, self.get_set(kind, direction))
+
+    def _word_key(self, entry):
+        """Key of the word of a progress entry in PracticeSet.word_stats."""
+        if 'word_pair' not in entry and 'word' in entry:
+            # Context answers (Learn page) name the word asked instead of carrying its word pair
+            return json.dumps({'word': entry['word']}, ensure_ascii=False)
+        word_id = self.word_table.id_of(entry.get('word_pair'))
+        if word_id is not None:
+            return str(word_id)
+        return json.dumps(entry.get('word_pair'), sort_keys=True, ensure_ascii=False)
+
+    def _roll_up_set(self, kind, direction):
+        """
+        Fold the old progress entries of a set into its per-word statistics.
+
+        Returns:
+            dict: {archive file name: JSON} holding the folded entries, if archiving is enabled.
+        """
+        pset = self.get_set(kind, direction)
+        if len(pset.progress) <= ROLLUP_THRESHOLD:
+            return {}
+        folded = pset.roll_up(self._word_key, PROGRESS_WINDOW)
+        if not (folded and ARCHIVE_ROLLED_UP):
+            return {}
+        columns = self._direction_columns(direction)
+        chunk = {
+            'kind': kind,
+            'direction': direction,
+            'chunk': pset.archive_chunks,
+            'entries': [self.word_table.encode_entry(entry, *columns) for entry in folded],
+        }
+        filename = archive_filename(self.exercise_name, set_shard_key(kind, direction), pset.archive_chunks)
+        pset.archive_chunks += 1
+        return {filename: json.dumps(chunk, ensure_ascii=False)}
+
+    def _set_summary(self, kind, direction):
+        """Answered/correct counts of a set, taken from the index while the set is not loaded."""
+        sets = getattr(self, SET_KINDS[kind])
+        if is_loaded(sets, direction):
+            pset = sets[direction]
+            return {'answered': pset.num_answered, 'correct': pset.num_correct}
+        entry = self.shard_index.get(set_shard_key(kind, direction), {})
+        return {'answered': entry.get('answered', 0), 'correct': entry.get('correct', 0)}
+
+    def _build_sharded_snapshot(self):
+        """
+        Build the shards of a snapshot and the index entries describing them.
+
+        Only dirty shards are serialized, and a dirty shard whose content hashes
+        the same as the stored one is not written again. Every written shard
+        carries a version that is bumped on each rewrite; the index records the
+        version it expects of each shard, together with per-set counters so
+        summaries never need the sets themselves.
+
+        Returns:
+            tuple: ({shard file name: JSON} of the files to write, {shard key: index entry})
+        """
+        shards = {}
+        index_shards = {}
+        for key in self._shard_keys():
+            entry = dict(self.shard_index.get(key, {}))
+            entry['file'] = shard_filename(self.exercise_name, key)
+            if key in self.dirty_shards or 'version' not in entry:
+                if '/' in key:
+                    shards.update(self._roll_up_set(*key.split('/', 1)))
+                shard = self._build_shard(key)
+                md5 = content_md5(json.dumps(shard, ensure_ascii=False))
+                if md5 != entry.get('md5') or 'version' not in entry:
+                    entry['version'] = entry.get('version', 0) + 1
+                    entry['md5'] = md5
+                    shard['version'] = entry['version']
+                    shards[entry['file']] = json.dumps(shard, ensure_ascii=False)
+            if '/' in key:
+                entry.update(self._set_summary(*key.split('/', 1)))
+            index_shards[key] = entry
+        return shards, index_shards
+
+    def _build_index(self):
+        """JSON of the snapshot index for the current journal and shard index."""
+        return json.dumps({
+            'schema_version': SHARDED_SCHEMA_VERSION,
+            'snapshot_id': self.journal.snapshot_id,
+            'source_language': self.source_language,
+            'target_language': self.target_language,
+            'exercise_name': self.exercise_name,
+            'tolerance': self.tolerance,
+            'ignore_accents': self.ignore_accents,
+            'grader': self.grader,
+            'shards': self.shard_index,
+        }, ensure_ascii=False)
+
+    def _persisted_state(self):
+        """Everything a save depends on besides the shards: journal position and settings."""
+        return (self.journal.snapshot_id, len(self.journal.events), self.tolerance, self.ignore_accents, self.grader)
+
+    def has_unsaved_changes(self):
+        """True if the session changed since it was last saved or loaded."""
+        return self.snapshot_required or self._persisted_state() != self.saved_state
+
+    def manifest_entry(self):
+        """Summary of this exercise for the user's progress manifest."""
+        summaries = [self._set_summary('practice', direction) for direction in self.practice_sets.keys()]
+        return {
+            'exercise_name': self.exercise_name,
+            'source_language': self.source_language,
+            'target_language': self.target_language,
+            'progress_file': progress_filename(self.exercise_name),
+            'last_modified': datetime.now().isoformat(),
+            'total_words': len(self.original_word_list),
+            'answered': sum(summary['answered'] for summary in summaries),
+            'correct': sum(summary['correct'] for summary in summaries),
+            'mistakes': sum(len(words) for words in self.mistakes.values()),
+        }
+
+    def export_progress_json(self):
+        """Serialize the full current session (snapshot plus journal tail) to JSON, e.g. for downloads."""
+        return json.dumps(self.build_progress_data(), ensure_ascii=False)
+
+    def reload_from_storage(self, drive_manager, user_folder_id):
+        """Reload the exercise from storage, e.g. after another device's changes were merged into it."""
+        reader = ProgressFileReader(drive_manager, user_folder_id)
+        index_file = progress_filename(self.exercise_name)
+        journal_file = journal_filename(self.exercise_name)
+        contents = reader.read_many([index_file, journal_file])
+        if contents[index_file] is None:
+            return False
+        journal = contents[journal_file]
+        self.load_from_progress(
+            json.loads(contents[index_file]), journal.decode('utf-8') if journal else '', shard_reader=reader
+        )
+        return True
+
+    def save_progress_data(self, drive_manager=None, user_folder_id=None, async_save=True):
+        """
+        Persists the current session to the local progress cache and replicates it to Google Drive.
+
+        Normally only the journal of events since the last snapshot is written, so
+        the cost per answer does not grow with the history. A snapshot is written
+        when one was requested (new exercise, resets, ...), when the settings
+        changed or when the journal has grown past its compaction interval.
+        Snapshots are sharded: only shards whose content changed since the
+        previous snapshot are rewritten, plus the small index.
+
+        Nothing is serialized or uploaded if the session has not changed since
+        it was last saved or loaded.
+
+        Uploads are merged with what other devices wrote in the meantime (see
+        progress_shards). When that brought in someone else's changes, this
+        save pushes the session's own events and then reloads the combined state.
+
+        Returns:
+            bool: True if anything was written, False if the save was skipped.
+        """
+        if not (drive_manager and user_folder_id):
+            return False
+        if not self.has_unsaved_changes():
+            self.save_stats['skipped'] += 1
+            return False
+
+        scheduler = get_upload_scheduler()
+        index_file = progress_filename(self.exercise_name)
+        settings_changed = self.saved_state is None or self.saved_state[2:] != self._persisted_state()[2:]
+        wrote_snapshot = self.snapshot_required or settings_changed or self.journal.needs_compaction()
+        merges = remote_merge_count(user_folder_id, index_file)
+        if not wrote_snapshot and merges != self.remote_merges_seen:
+            # Push our own events on top of the merged files first, then pick up the combined state
+            key = stage_journal(drive_manager, user_folder_id, index_file, self.journal.state())
+            scheduler.wait(key)
+            if not is_staged(user_folder_id, index_file) and self.reload_from_storage(drive_manager, user_folder_id):
+                self.remote_merges_seen = remote_merge_count(user_folder_id, index_file)
+                self.save_stats['written'] += 1
+                return True
+
+        if wrote_snapshot:
+            shards, index_shards = self._build_sharded_snapshot()
+            self.snapshot_required = False
+            self.dirty_shards = set()
+            if not (shards or self.journal.events or settings_changed) and index_shards == self.shard_index:
+                # e.g. resetting a set that had not been started
+                self.saved_state = self._persisted_state()
+                self.save_stats['skipped'] += 1
+                return False
+
+            # Fold the journal into a new snapshot
+            self.journal.compact()
+            self.shard_index = index_shards
+            # Shards, index and journal share the index's lane, which uploads the index after the shards
+            key = stage_snapshot(
+                drive_manager, user_folder_id, index_file, shards, self._build_index(), self.journal.state(),
+                replace=self.replace_stored
+            )
+            if self.replace_stored:
+                # Merges into the replaced files are no reason to reload
+                self.replace_stored = False
+                self.remote_merges_seen = remote_merge_count(user_folder_id, index_file)
+        else:
+            # The local cache is the primary copy; storage is replicated in the background,
+            # and uploads of an exercise are ordered and coalesced to the newest one
+            key = stage_journal(drive_manager, user_folder_id, index_file, self.journal.state())
+
+        self.saved_state = self._persisted_state()
+        self.save_stats['written'] += 1
+
+        if not async_save:
+            # Going through the lane keeps an older queued upload from landing after this one
+            scheduler.wait(key)
+
+        # Keep the menu's summary reasonably fresh without a second upload per answer
+        if wrote_snapshot or time.monotonic() - self.manifest_updated_at >= MANIFEST_UPDATE_INTERVAL:
+            update_manifest(drive_manager, user_folder_id, [self.manifest_entry()])
+            self.manifest_updated_at = time.monotonic()
 
-        return progress_json
+        return True
@@ -1,14 +1,19 @@
 # src/sections/practice_utils.py
 
 import random
-import re
 import streamlit as st
 import json
 
 from sections.components import render_flashcard, render_feedback
-from utils.helpers import compare_strings, expand_parentheses, tts_audio, LANGUAGE_OPTIONS
+from utils.edit_distance import GRADERS
+from utils.helpers import tts_audio, LANGUAGE_OPTIONS
 from sections.practice_session import PracticeSession
 
+GRADER_LABELS = {
+    'similarity': "Similarity",
+    'edit_distance': "Edit distance",
+}
+
 
 def practice_logic(
     practice_session: PracticeSession,
@@ -34,6 +39,32 @@ def practice_logic(
         value=practice_session.ignore_accents,
         key=f'ignore_accents_{mode}'
     )
+    practice_session.grader = st.sidebar.selectbox(
+        "Typo grading",
+        list(GRADERS),
+        index=list(GRADERS).index(practice_session.grader),
+        format_func=GRADER_LABELS.get,
+        help=("Similarity compares how much of the answer matches. Edit distance counts typos "
+              "(wrong, missing, extra or swapped letters): (100 - tolerance)% of the letters may be wrong, "
+              "e.g. one typo per five letters at tolerance 80."),
+        key=f'grader_{mode}'
+    )
+    if st.sidebar.button(
+        "Regrade past answers",
+        help="Grade the answers given so far again with the settings above and update the mistakes.",
+        key=f'regrade_{mode}'
+    ):
+        stats = practice_session.regrade_answers()
+        if stats['changed']:
+            practice_session.save_progress_data(
+                drive_manager=st.session_state.get('drive_manager'),
+                user_folder_id=st.session_state.get('user_folder_id'),
+                async_save=True
+            )
+        st.sidebar.success(
+            f"Regraded {stats['checked']} answers: {stats['changed']} changed, "
+            f"{stats['added']} added to and {stats['removed']} removed from mistakes."
+        )
 
     source_language = practice_session.source_language
     target_language = practice_session.target_language
@@ -53,9 +84,9 @@ def practice_logic(
     tolerance = practice_session.tolerance
     ignore_accents = practice_session.ignore_accents
 
-    # Calculate correct/incorrect so far
-    num_correct = sum(1 for item in practice_set.progress if item['correct'])
-    num_incorrect = sum(1 for item in practice_set.progress if not item['correct'])
+    # Correct/incorrect so far, kept up to date by the set itself
+    num_correct = practice_set.num_correct
+    num_incorrect = practice_set.num_incorrect
 
     # Display progress bar
     total_words = len(practice_set.word_list)
@@ -86,10 +117,12 @@ def practice_logic(
             question = current_word_pair[source_language]
             answer = current_word_pair[target_language]
             tts_language = source_language_code
+            answer_language = target_language_code
         else:
             question = current_word_pair[target_language]
             answer = current_word_pair[source_language]
             tts_language = target_language_code
+            answer_language = source_language_code
 
         render_flashcard(question)
 
@@ -102,19 +135,10 @@ def practice_logic(
             practice_set.last_feedback_message = None  # clear previous feedback
             user_input = st.session_state.get('user_input', '')
 
-            # Acceptable answers: possibly split by commas or parentheses
-            acceptable_answers = parse_acceptable_answers(answer)
-            correct = False
-            original_correct_answer = None
-
-            for ans in acceptable_answers:
-                is_correct, original_ans, exact_match = compare_strings(
-                    user_input, ans, tolerance, ignore_accents
-                )
-                if is_correct:
-                    correct = True
-                    original_correct_answer = original_ans
-                    break
+            # Acceptable answers were split, expanded and normalized when the exercise was loaded
+            correct, original_correct_answer, exact_match = practice_session.answer_index.grade(
+                user_input, answer, tolerance, ignore_accents, practice_session.grader, answer_language
+            )
 
             # Generate feedback
             if correct:
@@ -132,7 +156,7 @@ def practice_logic(
             else:
                 feedback = (
                     f"Incorrect! Your answer: **{user_input}**. "
-                    f"Acceptable answers: **{', '.join(acceptable_answers)}**"
+                    f"Acceptable answers: **{', '.join(practice_session.answer_index.answers(answer, answer_language))}**"
                 )
                 practice_set.last_feedback_message = ('error', feedback)
                 if mode == 'practice':
@@ -210,11 +234,12 @@ def practice_logic(
         with col2:
             if st.button("Download progress"):
                 # Save current progress data
-                progress_json = practice_session.save_progress_data(
+                practice_session.save_progress_data(
                     drive_manager=st.session_state.get('drive_manager'),
                     user_folder_id=st.session_state.get('user_folder_id'),
                     async_save=False  # to ensure we have a local copy before download
                 )
+                progress_json = practice_session.export_progress_json()
                 # Download button
                 st.download_button(
                     label="Download Progress",
@@ -228,22 +253,6 @@ def practice_logic(
                 pronounce_answer(practice_session)
 
 
-def parse_acceptable_answers(answer_string: str):
-    """
-    Splits 'answer_string' by commas or any pattern like 'a)', 'b)', etc.
-    and also expands parentheses for optional content.
-    """
-    # Regex that splits by commas or labels like 'a)' with optional whitespace
-    split_pattern = re.compile(r',|\s*[a-zA-Z]\)\s*')
-
-    raw_answers = [ans.strip() for ans in split_pattern.split(answer_string) if ans.strip()]
-    expanded_answers = []
-    for ans in raw_answers:
-        expanded_answers.extend(expand_parentheses(ans))
-    # Deduplicate
-    return list(set(expanded_answers))
-
-
 def change_assessment(practice_session: PracticeSession, mode='practice', direction='Source to Target'):
     """Toggle the 'correct' status of the last entry in progress and update mistakes accordingly."""
     if mode not in ['practice', 'mistakes']:
@@ -259,15 +268,14 @@ def change_assessment(practice_session: PracticeSession, mode='practice', direct
         st.warning("No previous answer to change assessment.")
         return
 
-    last_entry = practice_set.progress[-1]
-    last_entry['correct'] = not last_entry['correct']
+    last_entry = practice_session.change_last_assessment(mode, direction)
     correct_status = last_entry['correct']
     user_answer = last_entry['your_answer']
     word_pair = last_entry['word_pair']
 
     if correct_status:
         feedback = f"Corrected to correct. Your answer: **{user_answer}**"
-        practice_set.last_feedback_message = ('success', feedback)
+        practice_session.set_feedback(mode, direction, ('success', feedback))
         st.success(feedback)
 
         if mode == 'practice':
@@ -275,7 +283,7 @@ def change_assessment(practice_session: PracticeSession, mode='practice', direct
             practice_session.remove_from_mistakes(word_pair, direction)
     else:
         feedback = f"Corrected to incorrect. Your answer: **{user_answer}**"
-        practice_set.last_feedback_message = ('error', feedback)
+        practice_session.set_feedback(mode, direction, ('error', feedback))
         st.error(feedback)
 
         if mode == 'practice':
@@ -305,9 +313,7 @@ def remove_current_question(practice_session: PracticeSession, mode='practice',
         return
 
     # Remove question from word_list + progress
-    current_word_pair = practice_set.word_list.pop(practice_set.current_index - 1)
-    practice_set.progress.pop(practice_set.current_index - 1)
-    practice_set.current_index -= 1
+    current_word_pair = practice_session.remove_last_question(mode, direction)
 
     if mode == 'practice':
         # Also remove from mistakes if present
@@ -0,0 +1,126 @@
+# src/utils/answer_index.py
+
+import re
+from collections import namedtuple
+
+from utils.answer_pattern import AnswerPattern
+from utils.edit_distance import DEFAULT_GRADER, GRADERS, NEAREST_EXPANSION_GRADERS
+from utils.helpers import LANGUAGE_OPTIONS
+from utils.normalization import get_normalizer
+
+# Answers are separated by commas, semicolons ("to be; to become") or labels like 'a)', 'b)'.
+# A label stands on its own, so the 'e)' of "(the) food" is not one.
+ANSWER_SPLIT_PATTERN = re.compile(r'[,;]|(?<![^\s,;])[a-zA-Z]\)\s*')
+
+# One acceptable answer as written, with the patterns of the forms it is compared in
+Candidate = namedtuple("Candidate", ["text", "pattern", "lowered", "normalized"])
+
+
+def parse_acceptable_answers(answer_string):
+    """
+    Split an answer cell into its acceptable answers, keeping the optional
+    parts in parentheses, e.g. "(the) food; meal" -> ["(the) food", "meal"].
+    """
+    raw_answers = [ans.strip() for ans in ANSWER_SPLIT_PATTERN.split(answer_string) if ans.strip()]
+    # Deduplicate, keeping the order of the cell
+    return list(dict.fromkeys(raw_answers))
+
+
+def make_candidates(answers, normalize_many):
+    """Candidates of parsed answers; 'normalize_many' normalizes the texts of all their parts as one batch."""
+    patterns = [AnswerPattern.parse(ans) for ans in answers]
+    normalized = iter(normalize_many([text for pattern in patterns for text, _ in pattern.parts]))
+    return [
+        Candidate(ans, pattern, pattern.transform(str.lower), pattern.transform(lambda _: next(normalized)))
+        for ans, pattern in zip(answers, patterns)
+    ]
+
+
+class AnswerIndex:
+    """
+    The acceptable answers of an exercise, parsed and normalized once.
+
+    Entries are keyed by the answer cell and its language code (which picks
+    the normalizer), which is what a word pair and a direction determine.
+    Cells that were not indexed up front (e.g. words added later) are
+    indexed on first use.
+    """
+
+    def __init__(self):
+        self._candidates = {}
+
+    @classmethod
+    def build(cls, word_pairs, columns):
+        """
+        Index the cells of 'columns' (both languages of an exercise, by name)
+        of every word pair. Each column is normalized as one batch.
+        """
+        index = cls()
+        for column in columns:
+            language = LANGUAGE_OPTIONS.get(column)
+            cells = [value for value in dict.fromkeys(pair.get(column) for pair in word_pairs) if isinstance(value, str)]
+            answers = [parse_acceptable_answers(cell) for cell in cells]
+            candidates = iter(make_candidates(
+                [ans for cell_answers in answers for ans in cell_answers], get_normalizer(language).many
+            ))
+            for cell, cell_answers in zip(cells, answers):
+                index._candidates[(language, cell)] = tuple(next(candidates) for _ in cell_answers)
+        return index
+
+    def __len__(self):
+        return len(self._candidates)
+
+    def candidates(self, answer_string, language=None):
+        """The Candidates of an answer cell in the language with code 'language'."""
+        candidates = self._candidates.get((language, answer_string))
+        if candidates is None:
+            candidates = tuple(make_candidates(parse_acceptable_answers(answer_string), get_normalizer(language).many))
+            self._candidates[(language, answer_string)] = candidates
+        return candidates
+
+    def answers(self, answer_string, language=None):
+        """The acceptable answers of a cell as plain strings."""
+        return [candidate.text for candidate in self.candidates(answer_string, language)]
+
+    def grade(self, user_input, answer_string, tolerance, ignore_accents, grader=DEFAULT_GRADER, language=None):
+        """
+        Compare a user's answer with every acceptable answer of a cell, using
+        one of the GRADERS of utils.edit_distance. The input is normalized
+        once, for the answer's language; the answers were normalized when indexed.
+        An answer with optional parts is accepted if any of its expansions
+        passes. Graders in NEAREST_EXPANSION_GRADERS, and every grader for
+        answers with more than MAX_EXPANSIONS (see utils.answer_pattern)
+        expansions, only try the expansion closest to the input (see
+        AnswerPattern.nearest), so grading never takes time exponential in
+        the number of optional parts.
+
+        Returns:
+            tuple: (is_correct, matched answer or None, exact_match)
+        """
+        matches = GRADERS[grader]
+        nearest_only = grader in NEAREST_EXPANSION_GRADERS
+        user_form = get_normalizer(language)(user_input) if ignore_accents else user_input.lower()
+        for candidate in self.candidates(answer_string, language):
+            answer_form = candidate.normalized if ignore_accents else candidate.lowered
+            if not answer_form.fullmatch(user_form):
+                forms = None if nearest_only else answer_form.expansions()
+                if forms is None:
+                    forms = (answer_form.nearest(user_form),)
+                if not any(matches(user_form, form, tolerance) for form in forms):
+                    continue
+            return True, candidate.text, candidate.pattern.fullmatch(user_input)
+        return False, None, False
+
+    def grade_many(self, pairs, tolerance, ignore_accents, grader=DEFAULT_GRADER, language=None):
+        """
+        grade() for a batch of (user_input, answer_string) pairs, e.g. a whole
+        answer history. Each distinct pair is graded once.
+
+        Returns:
+            list: is_correct for every pair.
+        """
+        verdicts = {}
+        for pair in pairs:
+            if pair not in verdicts:
+                verdicts[pair] = self.grade(*pair, tolerance, ignore_accents, grader, language)[0]
+        return [verdicts[pair] for pair in pairs]
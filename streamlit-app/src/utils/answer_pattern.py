@@ -0,0 +1,184 @@
+# src/utils/answer_pattern.py
+
+import re
+
+from utils.helpers import PARENTHESES_PATTERN
+
+# Most expansions expansions() lists; answers with more are only graded against nearest()
+MAX_EXPANSIONS = 64
+
+
+def parse_optional_parts(answer):
+    """
+    Split an answer into (text, optional) parts, where optional parts are the
+    ones in parentheses, e.g. "(the) food" -> [("the ", True), ("food", False)].
+
+    A space next to an optional part moves into it, so leaving the part out
+    leaves no double or dangling space: "to (be) go" means "to go" or "to be go",
+    "go (away)" means "go" or "go away".
+    """
+    if '(' not in answer:
+        return [(answer.strip(), False)] if answer.strip() else []
+    parts = []
+    position = 0
+    at_word_start = True
+    for match in PARENTHESES_PATTERN.finditer(answer):
+        fixed = answer[position:match.start()]
+        optional = match.group(1).strip()
+        after = answer[match.end():]
+        position = match.end()
+        if fixed:
+            at_word_start = fixed[-1].isspace()
+        if not optional:
+            continue
+        if at_word_start and after[:1].isspace():
+            optional += ' '
+            position += len(after) - len(after.lstrip())
+        if fixed:
+            parts.append((fixed, False))
+        parts.append((optional, True))
+    if answer[position:].strip():
+        parts.append((answer[position:], False))
+    else:
+        # Optional parts at the end take the space before them instead: "red (a) (house)"
+        run_start = len(parts)
+        while run_start and parts[run_start - 1][1]:
+            run_start -= 1
+        if run_start and parts[run_start - 1][0][-1:].isspace():
+            parts[run_start - 1] = (parts[run_start - 1][0].rstrip(), False)
+            parts[run_start:] = [(' ' + text.rstrip(), True) for text, _ in parts[run_start:]]
+        elif run_start < len(parts):
+            parts[run_start + 1:] = [(' ' + text.rstrip(), True) for text, _ in parts[run_start + 1:]]
+            parts[run_start] = (parts[run_start][0].rstrip(), True)
+
+    # Like each expanded answer, the pattern as a whole is stripped
+    if parts and not parts[0][1]:
+        parts[0] = (parts[0][0].lstrip(), False)
+    if parts and not parts[-1][1]:
+        parts[-1] = (parts[-1][0].rstrip(), False)
+    return [part for part in parts if part[0]]
+
+
+class AnswerPattern:
+    """
+    An answer with optional parts, matched without expanding it into every
+    combination of parts (2^n strings for n optional parts).
+
+    Membership is tested with a regular expression. For fuzzy matching,
+    nearest() walks the answer once per input character, with an edge that
+    skips each optional part, and finds the expansion closest to the input
+    in edit distance. Graders that score by another measure use expansions(),
+as long as there are few of them.
+    """
+
+    __slots__ = ('parts', 'text', 'has_optional_parts', '_regex', '_skips')
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+        if len(self.parts) == 1 and not self.parts[0][1]:
+            self.text, self.has_optional_parts = self.parts[0][0], False
+        else:
+            self.text = ''.join(text for text, _ in self.parts)
+            self.has_optional_parts = any(optional for _, optional in self.parts)
+        # Built on first use: most answers have no optional parts and never need them
+        self._regex = None
+        self._skips = None
+
+    @classmethod
+    def parse(cls, answer):
+        return cls(parse_optional_parts(answer))
+
+    def transform(self, function):
+        """The same pattern with 'function' (e.g. a normalizer) applied to the text of each part."""
+        return AnswerPattern((function(text), optional) for text, optional in self.parts)
+
+    def fullmatch(self, text):
+        """True if 'text' is one of the expansions of the pattern."""
+        if not self.has_optional_parts:
+            return text.strip() == self.text
+        if self._regex is None:
+            # Spaces at either end remain when only optional parts are left, as in "(to) (be)"
+            self._regex = re.compile(r'\s*' + ''.join(
+                f'(?:{re.escape(text)})?' if optional else re.escape(text) for text, optional in self.parts
+            ) + r'\s*')
+        return self._regex.fullmatch(text) is not None
+
+    def expansion(self, taken):
+        """The expansion with the optional parts whose bits are set in 'taken'."""
+        pieces = []
+        bit = 1
+        for text, optional in self.parts:
+            if not optional:
+                pieces.append(text)
+                continue
+            if taken & bit:
+                pieces.append(text)
+            bit <<= 1
+        return ''.join(pieces).strip()
+
+    def expansions(self, limit=MAX_EXPANSIONS):
+        """
+        Every distinct expansion of the pattern, e.g. ["food", "the food"] for
+        "(the) food", or None if there could be more than 'limit' of them.
+        """
+        if not self.has_optional_parts:
+            return [self.text]
+        optional_count = sum(optional for _, optional in self.parts)
+        if 1 << optional_count > limit:
+            return None
+        return list(dict.fromkeys(self.expansion(taken) for taken in range(1 << optional_count)))
+
+    def nearest(self, text):
+        """
+        The expansion with the smallest edit distance to 'text'. Takes time
+        proportional to len(text) * len(self.text), whatever the number of
+        optional parts.
+        """
+        if not self.has_optional_parts:
+            return self.text
+
+        if self._skips is None:
+            # Optional part k spans self.text[start:end]; reaching 'end' through it sets bit k
+            self._skips = {}
+            start = 0
+            for part, optional in self.parts:
+                end = start + len(part)
+                if optional:
+                    self._skips[end] = (start, 1 << len(self._skips))
+                start = end
+
+        pattern = self.text
+        skips = self._skips
+        size = len(pattern) + 1
+
+        # Row for no input consumed: pattern characters can only be skipped
+        distance = [0] * size
+        taken = [0] * size
+        for j in range(1, size):
+            bit = skips[j][1] if j in skips else 0
+            distance[j] = distance[j - 1] + 1
+            taken[j] = taken[j - 1] | bit
+            if j in skips and distance[skips[j][0]] < distance[j]:
+                distance[j], taken[j] = distance[skips[j][0]], taken[skips[j][0]]
+
+        for char in text:
+            previous_distance, previous_taken = distance, taken
+            distance = [previous_distance[0] + 1] + [0] * (size - 1)
+            taken = [previous_taken[0]] + [0] * (size - 1)
+            for j in range(1, size):
+                bit = skips[j][1] if j in skips else 0
+                # Match or substitute the pattern character
+                best = previous_distance[j - 1] + (pattern[j - 1] != char)
+                best_taken = previous_taken[j - 1] | bit
+                # Extra input character
+                if previous_distance[j] + 1 < best:
+                    best, best_taken = previous_distance[j] + 1, previous_taken[j]
+                # Missing pattern character
+                if distance[j - 1] + 1 < best:
+                    best, best_taken = distance[j - 1] + 1, taken[j - 1] | bit
+                # Optional part left out
+                if j in skips and distance[skips[j][0]] < best:
+                    best, best_taken = distance[skips[j][0]], taken[skips[j][0]]
+                distance[j], taken[j] = best, best_taken
+
+        return self.expansion(taken[-1])
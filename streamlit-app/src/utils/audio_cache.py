@@ -0,0 +1,174 @@
+# src/utils/audio_cache.py
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+# Size caps of the disk and the in-memory layer; the least recently used clips go first
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(200 * 2 ** 20)))
+AUDIO_MEMORY_MAX_BYTES = int(os.getenv("AUDIO_MEMORY_MAX_BYTES", str(16 * 2 ** 20)))
+
+AUDIO_SUFFIX = '.mp3'
+
+logger = logging.getLogger(__name__)
+
+
+def audio_key(text, language, engine):
+    """Content address of the audio of 'text' spoken in 'language' by 'engine'."""
+    return hashlib.sha1(f"{engine}\0{language}\0{text}".encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Synthesized speech, kept on disk and in a small in-memory layer shared by
+    all sessions of the process.
+
+    Clips are stored under their audio_key(). Reading a clip from disk touches
+    its modification time, which is what the disk layer evicts by, so the
+    clips heard least recently are removed once the cache grows past
+    'max_bytes'.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES,
+                 memory_max_bytes=AUDIO_MEMORY_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evicted': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + AUDIO_SUFFIX)
+
+    def _disk_entries(self):
+        """(modification time, path, size) of every clip on disk."""
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(AUDIO_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def get(self, text, language, engine):
+        """
+        Returns:
+            bytes or None: The cached audio, or None if it has not been synthesized yet.
+        """
+        key = audio_key(text, language, engine)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return data
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Evicted meanwhile, or a read-only cache; the clip is served either way
+            pass
+
+        with self._lock:
+            self._stats['disk_hits'] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, text, language, engine, data):
+        """Store the audio of a clip in both layers. A clip that cannot be written to disk is only kept in memory."""
+        key = audio_key(text, language, engine)
+        with self._lock:
+            self._remember(key, data)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("Could not write audio clip %s to the disk cache.", key, exc_info=True)
+            return
+
+        with self._lock:
+            self._disk_bytes += len(data) - replaced
+            over_cap = self._disk_bytes > self.max_bytes
+        if over_cap:
+            self._evict()
+
+    def _remember(self, key, data):
+        """Add a clip to the memory layer, dropping the least recently used ones over its cap."""
+        if len(data) > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict(self):
+        """Remove the least recently used clips from disk until the cache is within 90% of its cap."""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._stats['evicted'] += evicted
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Hit, miss and eviction counters, and the bytes held in memory and on disk.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_bytes'] = self._memory_bytes
+            stats['disk_bytes'] = self._disk_bytes
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Return the process-wide AudioCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioCache()
+        return _cache
@@ -0,0 +1,90 @@
+# src/utils/edit_distance.py
+
+import difflib
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    Edit distance between 'a' and 'b', counting insertions, deletions,
+    substitutions and swaps of two adjacent characters as one edit each
+    (optimal string alignment, a restricted Damerau-Levenshtein distance).
+
+    Uses Hyyrö's bit-parallel algorithm: each character of 'b' updates a whole
+    column of the distance matrix with a few integer operations. The scan stops
+    as soon as the remaining characters can no longer bring the distance down
+    to 'max_distance'.
+
+    Returns:
+        int or None: The distance, or None if it is larger than 'max_distance'.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if not a or not b:
+        return max(len(a), len(b))
+
+    # Bit i of masks[c] is set if a[i] == c
+    masks = {}
+    for i, c in enumerate(a):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+
+    vp, vn, d0, previous_match = full, 0, 0, 0
+    distance = len(a)
+    remaining = len(b)
+    for c in b:
+        match = masks.get(c, 0)
+        transposition = ((~d0 & match) << 1) & previous_match
+        d0 = ((((match & vp) + vp) ^ vp) | match | vn | transposition) & full
+        hp = vn | (~(d0 | vp) & full)
+        hn = d0 & vp
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+        remaining -= 1
+        if distance - remaining > max_distance:
+            return None
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = hn | (~(d0 | hp) & full)
+        vn = hp & d0
+        previous_match = match
+
+    return distance if distance <= max_distance else None
+
+
+def max_typos(tolerance, length):
+    """
+    Number of edits the 0-100 tolerance setting allows in an answer of 'length'
+    characters (the longer of the input and the answer): the share of characters
+    that may be wrong is (100 - tolerance) percent, rounded down. Tolerance 100
+    accepts only exact answers, 80 allows one typo per five characters and 0
+    accepts anything, just like the similarity grader.
+    """
+    return length * (100 - tolerance) // 100
+
+
+def similarity_match(user_form, answer_form, tolerance):
+    """The original grader: difflib's similarity ratio, as a percentage, must reach the tolerance."""
+    return difflib.SequenceMatcher(None, user_form, answer_form).ratio() * 100 >= tolerance
+
+
+def edit_distance_match(user_form, answer_form, tolerance):
+    """Typo grader: the answer may be at most max_typos() edits away from the input."""
+    limit = max_typos(tolerance, max(len(user_form), len(answer_form)))
+    return bounded_edit_distance(user_form, answer_form, limit) is not None
+
+
+# Grading engines selectable per session ('grader' of a PracticeSession)
+GRADERS = {
+    'similarity': similarity_match,
+    'edit_distance': edit_distance_match,
+}
+DEFAULT_GRADER = 'similarity'
+
+# Graders that only need the expansion of an answer closest to the input in edit distance
+# (see AnswerPattern.nearest); the others are graded against every expansion
+NEAREST_EXPANSION_GRADERS = {'edit_distance'}
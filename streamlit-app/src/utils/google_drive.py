@@ -1,17 +1,55 @@
 import os
 import json
 import io
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, partial
+import httplib2
 import streamlit as st
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaIoBaseUpload
 from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 import dotenv
 
+from utils.rate_limit import get_drive_write_bucket
+from utils.storage import FOLDER_MIME_TYPE, ProgressStorage
+
 dotenv.load_dotenv(".env")
 
+# How long a cached name -> file ID lookup is trusted, in seconds
+DEFAULT_ID_CACHE_TTL = 600
+
+# Payloads up to this size are sent as a single multipart request instead of a resumable session
+SIMPLE_UPLOAD_LIMIT = 5 * 1024 * 1024
+
+# Socket timeout of Drive requests, in seconds
+HTTP_TIMEOUT = 60
+
+# Maximum number of calls Drive accepts in a single batch request
+BATCH_LIMIT = 100
+
+# Idle HTTP clients (each with an open connection) kept for reuse
+HTTP_POOL_SIZE = int(os.getenv("DRIVE_HTTP_POOL_SIZE", "8"))
+
+
+def _quote_query_value(value):
+    """Quote a string for use in a Drive search query."""
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
 
-class GoogleDriveManager:
-    def __init__(self, credentials_env_var='GDRIVE_CREDENTIALS', scopes=None):
+@lru_cache(maxsize=None)
+def _drive_discovery_document():
+    """The Drive v3 discovery document shipped with googleapiclient, parsed once per process."""
+    doc = get_static_doc('drive', 'v3')
+    return json.loads(doc) if doc else None
+
+
+class GoogleDriveManager(ProgressStorage):
+    def __init__(self, credentials_env_var='GDRIVE_CREDENTIALS', scopes=None, id_cache_ttl=DEFAULT_ID_CACHE_TTL):
         # Default to a common scope for Drive if none provided
         if scopes is None:
             scopes = ['https://www.googleapis.com/auth/drive']
@@ -22,9 +60,88 @@ class GoogleDriveManager:
             raise ValueError(f"Cannot find google drive credentials.")
         
 
-        creds = Credentials.from_service_account_info(service_account_info, scopes=scopes)
-        
-        self.service = build('drive', 'v3', credentials=creds)
+        # Shared by all threads; each AuthorizedHttp refreshes the token when it expires
+        self._credentials = Credentials.from_service_account_info(service_account_info, scopes=scopes)
+
+        # httplib2 connections are not thread-safe, so every request checks a client out of a
+        # pool and returns it afterwards. Streamlit runs each rerun on a new thread, so clients
+        # are shared by request rather than by thread; each keeps its connection open.
+        self._idle_http = []
+        self._http_lock = threading.Lock()
+        self._service = None
+
+        # (folder_id, name, mime_type) -> (file_id, expires_at); mime_type None matches any type
+        self.id_cache_ttl = id_cache_ttl
+        self._id_cache = {}
+        self._id_cache_lock = threading.Lock()
+
+    def _new_http(self):
+        return AuthorizedHttp(self._credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+
+    @contextmanager
+    def _http(self):
+        """
+        Check an HTTP client out of the pool for one request. A client whose
+        request failed is dropped rather than returned, since its connection
+        may be broken.
+        """
+        with self._http_lock:
+            http = self._idle_http.pop() if self._idle_http else None
+        if http is None:
+            http = self._new_http()
+        yield http
+        with self._http_lock:
+            if len(self._idle_http) < HTTP_POOL_SIZE:
+                self._idle_http.append(http)
+
+    @property
+    def service(self):
+        """
+        The Drive API client, shared by all threads. It only builds requests;
+        they are sent with _execute(), on a pooled HTTP client.
+        """
+        with self._http_lock:
+            if self._service is None:
+                http = self._new_http()
+                discovery_document = _drive_discovery_document()
+                if discovery_document is not None:
+                    self._service = build_from_document(discovery_document, http=http)
+                else:
+                    self._service = build('drive', 'v3', http=http)
+            return self._service
+
+    def _execute(self, request):
+        """Send a request built with self.service on a pooled HTTP client."""
+        with self._http() as http:
+            return request.execute(http=http)
+
+    def _throttle_writes(self, count=1):
+        """Wait for the shared write quota before sending 'count' write calls."""
+        get_drive_write_bucket().acquire(count)
+
+    def _cache_file_id(self, folder_id, name, file_id, mime_type=None):
+        expires_at = time.monotonic() + self.id_cache_ttl
+        with self._id_cache_lock:
+            self._id_cache[(folder_id, name, None)] = (file_id, expires_at)
+            if mime_type:
+                self._id_cache[(folder_id, name, mime_type)] = (file_id, expires_at)
+
+    def _cached_file_id(self, folder_id, name, mime_type=None):
+        with self._id_cache_lock:
+            cached = self._id_cache.get((folder_id, name, mime_type))
+            if cached is None:
+                return None
+            file_id, expires_at = cached
+            if expires_at < time.monotonic():
+                del self._id_cache[(folder_id, name, mime_type)]
+                return None
+            return file_id
+
+    def invalidate_file_id(self, folder_id, name):
+        """Drop cached IDs for 'name' in 'folder_id', e.g. after the file was found to be deleted."""
+        with self._id_cache_lock:
+            for key in [k for k in self._id_cache if k[0] == folder_id and k[1] == name]:
+                del self._id_cache[key]
 
     def list_files_in_directory(self, folder_id):
         """
@@ -41,35 +158,173 @@ class GoogleDriveManager:
         files = []
 
         while True:
-            response = self.service.files().list(
+            response = self._execute(self.service.files().list(
                 q=query,
                 spaces='drive',
                 fields='nextPageToken, files(id, name, mimeType)',
                 pageToken=page_token
-            ).execute()
+            ))
             files.extend(response.get('files', []))
+            for f in response.get('files', []):
+                self._cache_file_id(folder_id, f['name'], f['id'], f.get('mimeType'))
             page_token = response.get('nextPageToken', None)
             if page_token is None:
                 break
 
         return files
 
-    def get_file_id_by_name(self, folder_id, filename):
+    def find_file(self, folder_id, filename, mime_type=None):
+        """
+        Looks up a file by name with a server-side query instead of listing the folder.
+        If several files share the name, the oldest one is returned.
+        
+        Args:
+            folder_id (str): ID of the folder to search in.
+            filename (str): The exact name of the file.
+            mime_type (str, optional): Only match files of this MIME type.
+        
+        Returns:
+            dict or None: The file metadata (id, name, mimeType) if found, otherwise None.
+        """
+        response = self._execute(self._find_file_request(folder_id, filename, mime_type))
+        files = response.get('files', [])
+        return files[0] if files else None
+
+    def _find_file_request(self, folder_id, filename, mime_type=None):
+        query = (f"name = {_quote_query_value(filename)} and "
+                 f"{_quote_query_value(folder_id)} in parents and trashed=false")
+        if mime_type:
+            query += f" and mimeType = {_quote_query_value(mime_type)}"
+
+        return self.service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id, name, mimeType)',
+            orderBy='createdTime',
+            pageSize=1
+        )
+
+    def get_file_id_by_name(self, folder_id, filename, mime_type=None):
         """
         Given a folder ID and a filename, returns the file ID if it exists.
+        Results are cached for 'id_cache_ttl' seconds; misses are resolved with a
+        single name query.
         
         Args:
             folder_id (str): ID of the folder to search in.
             filename (str): The name of the file you're looking for.
+            mime_type (str, optional): Only match files of this MIME type.
         
         Returns:
             str or None: The file ID if found, otherwise None.
         """
-        files = self.list_files_in_directory(folder_id)
-        for f in files:
-            if f['name'] == filename:
-                return f['id']
-        return None
+        file_id = self._cached_file_id(folder_id, filename, mime_type)
+        if file_id:
+            return file_id
+
+        f = self.find_file(folder_id, filename, mime_type)
+        if f is None:
+            return None
+        self._cache_file_id(folder_id, filename, f['id'], f.get('mimeType'))
+        return f['id']
+
+    def execute_batch(self, requests):
+        """
+        Executes several API requests in as few HTTP round trips as possible.
+        Media uploads and downloads cannot be batched.
+        
+        Args:
+            requests (list): Unexecuted requests, e.g. self.service.files().get(...).
+        
+        Returns:
+            list of tuple: (response, exception) per request, in order. Exactly one of the two is None.
+        """
+        results = [(None, None)] * len(requests)
+        if len(requests) == 1:
+            # A batch of one only adds overhead
+            try:
+                results[0] = (self._execute(requests[0]), None)
+            except HttpError as e:
+                results[0] = (None, e)
+            return results
+
+        def store(index, request_id, response, exception):
+            results[index] = (response, exception)
+
+        for start in range(0, len(requests), BATCH_LIMIT):
+            batch = self.service.new_batch_http_request()
+            for index in range(start, min(start + BATCH_LIMIT, len(requests))):
+                batch.add(requests[index], callback=partial(store, index))
+            with self._http() as http:
+                batch.execute(http=http)
+        return results
+
+    def get_file_ids_by_name(self, folder_id, filenames, mime_type=None):
+        """
+        Batched get_file_id_by_name(): resolves several names in one round trip.
+        
+        Args:
+            folder_id (str): ID of the folder to search in.
+            filenames (list of str): The names to look up.
+            mime_type (str, optional): Only match files of this MIME type.
+        
+        Returns:
+            dict: File ID (or None if not found) per name.
+        """
+        file_ids = {name: self._cached_file_id(folder_id, name, mime_type) for name in filenames}
+        missing = [name for name, file_id in file_ids.items() if not file_id]
+        results = self.execute_batch([self._find_file_request(folder_id, name, mime_type) for name in missing])
+        for name, (response, exception) in zip(missing, results):
+            if exception is not None:
+                raise exception
+            files = response.get('files', [])
+            if files:
+                self._cache_file_id(folder_id, name, files[0]['id'], files[0].get('mimeType'))
+                file_ids[name] = files[0]['id']
+        return file_ids
+
+    def get_files_metadata(self, file_ids, fields='id, name, md5Checksum, modifiedTime'):
+        """
+        Batched get_file_metadata().
+        
+        Args:
+            file_ids (list of str): The IDs of the files.
+            fields (str, optional): Comma-separated metadata fields to return.
+        
+        Returns:
+            dict: Metadata per file ID, or None for files that do not exist.
+        """
+        results = self.execute_batch([self.service.files().get(fileId=i, fields=fields) for i in file_ids])
+        metadata = {}
+        for file_id, (response, exception) in zip(file_ids, results):
+            if exception is not None:
+                if exception.resp.status != 404:
+                    raise exception
+            metadata[file_id] = response
+        return metadata
+
+    def create_directories(self, names, parent_folder_id):
+        """
+        Batched create_directory(): creates several folders in one round trip.
+        
+        Returns:
+            dict: The new folder ID per name.
+        """
+        requests = [
+            self.service.files().create(
+                body={'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_folder_id]},
+                fields='id'
+            )
+            for name in names
+        ]
+        self._throttle_writes(len(requests))
+        folder_ids = {}
+        for name, (response, exception) in zip(names, self.execute_batch(requests)):
+            if exception is not None:
+                raise exception
+            self._cache_file_id(parent_folder_id, name, response['id'], FOLDER_MIME_TYPE)
+            folder_ids[name] = response['id']
+        return folder_ids
 
     def create_directory(self, name, parent_folder_id=None):
         """
@@ -84,13 +339,16 @@ class GoogleDriveManager:
         """
         file_metadata = {
             'name': name,
-            'mimeType': 'application/vnd.google-apps.folder'
+            'mimeType': FOLDER_MIME_TYPE
         }
 
         if parent_folder_id:
             file_metadata['parents'] = [parent_folder_id]
 
-        folder = self.service.files().create(body=file_metadata, fields='id').execute()
+        self._throttle_writes()
+        folder = self._execute(self.service.files().create(body=file_metadata, fields='id'))
+        if parent_folder_id:
+            self._cache_file_id(parent_folder_id, name, folder.get('id'), FOLDER_MIME_TYPE)
         return folder.get('id')
 
     def upload_file_to_directory(self, file_path, folder_id, mime_type='application/json'):
@@ -112,14 +370,123 @@ class GoogleDriveManager:
         }
 
         media = MediaFileUpload(file_path, mimetype=mime_type, resumable=True)
-        file = self.service.files().create(
+        self._throttle_writes()
+        file = self._execute(self.service.files().create(
             body=file_metadata,
             media_body=media,
             fields='id'
-        ).execute()
+        ))
 
+        self._cache_file_id(folder_id, file_name, file.get('id'), mime_type)
         return file.get('id')
 
+    def upload_bytes(self, data, file_name, folder_id, mime_type='application/json', file_id=None):
+        """
+        Uploads in-memory content to Google Drive without going through a local file.
+        Small payloads use a single multipart request; larger ones a resumable upload.
+        
+        Args:
+            data (bytes, str or io.BytesIO): The file content. Strings are encoded as UTF-8.
+            file_name (str): Name of the file in Drive.
+            folder_id (str): ID of the folder the file lives in.
+            mime_type (str, optional): MIME type of the file. Defaults to 'application/json'.
+            file_id (str, optional): ID of an existing file to overwrite. If omitted, a new file is created.
+        
+        Returns:
+            str: The file ID of the uploaded file.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        buffer = data if isinstance(data, io.BytesIO) else io.BytesIO(data)
+        size = buffer.getbuffer().nbytes
+
+        media = MediaIoBaseUpload(buffer, mimetype=mime_type, resumable=size > SIMPLE_UPLOAD_LIMIT)
+        self._throttle_writes()
+        if file_id:
+            file = self._execute(self.service.files().update(
+                fileId=file_id,
+                media_body=media,
+                fields='id'
+            ))
+        else:
+            file = self._execute(self.service.files().create(
+                body={'name': file_name, 'parents': [folder_id]},
+                media_body=media,
+                fields='id'
+            ))
+
+        self._cache_file_id(folder_id, file_name, file.get('id'), mime_type)
+        return file.get('id')
+
+    def get_file_metadata(self, file_id, fields='id, name, md5Checksum, modifiedTime'):
+        """
+        Fetches metadata of a single file without downloading its content.
+        
+        Args:
+            file_id (str): The ID of the file.
+            fields (str, optional): Comma-separated metadata fields to return.
+        
+        Returns:
+            dict: The requested metadata fields.
+        """
+        return self._execute(self.service.files().get(fileId=file_id, fields=fields))
+
+    def update_files_metadata(self, updates):
+        """
+        Updates the metadata (name, description, ...) of several files in one round trip.
+        
+        Args:
+            updates (dict): Metadata body per file ID, e.g. {file_id: {'name': 'new.json'}}.
+        """
+        self._throttle_writes(len(updates))
+        results = self.execute_batch([
+            self.service.files().update(fileId=file_id, body=body, fields='id')
+            for file_id, body in updates.items()
+        ])
+        for response, exception in results:
+            if exception is not None:
+                raise exception
+        # Names may have changed
+        with self._id_cache_lock:
+            self._id_cache = {k: v for k, v in self._id_cache.items() if v[0] not in updates}
+
+    def delete_file(self, file_id):
+        """
+        Permanently deletes a file.
+        
+        Args:
+            file_id (str): The ID of the file to delete.
+        """
+        self.delete_files([file_id])
+
+    def delete_files(self, file_ids):
+        """
+        Permanently deletes several files in one round trip. Files that no longer exist are ignored.
+        
+        Args:
+            file_ids (list of str): The IDs of the files to delete.
+        """
+        self._throttle_writes(len(file_ids))
+        results = self.execute_batch([self.service.files().delete(fileId=file_id) for file_id in file_ids])
+        for response, exception in results:
+            if exception is not None and exception.resp.status != 404:
+                raise exception
+        deleted = set(file_ids)
+        with self._id_cache_lock:
+            self._id_cache = {k: v for k, v in self._id_cache.items() if v[0] not in deleted}
+
+    def download_bytes(self, file_id):
+        """
+        Downloads a file from Google Drive into memory.
+        
+        Args:
+            file_id (str): The ID of the file to be downloaded.
+        
+        Returns:
+            bytes: The file content.
+        """
+        return self._execute(self.service.files().get_media(fileId=file_id))
+
     def download_file(self, file_id, destination_path):
         """
         Downloads a file from Google Drive by its file ID.
@@ -137,18 +504,38 @@ class GoogleDriveManager:
         os.makedirs(os.path.dirname(destination_path), exist_ok=True)
 
         fh = io.FileIO(destination_path, 'wb')
-        downloader = MediaIoBaseDownload(fh, request)
-        
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-            if status:
-                print(f"Download {int(status.progress() * 100)}%.")
+        with self._http() as http:
+            request.http = http
+            downloader = MediaIoBaseDownload(fh, request)
+
+            done = False
+            while not done:
+                status, done = downloader.next_chunk()
+                if status:
+                    print(f"Download {int(status.progress() * 100)}%.")
 
         fh.close()
         return destination_path
 
 
+_drive_manager = None
+_drive_manager_lock = threading.Lock()
+
+
+def get_drive_manager():
+    """
+    Return the process-wide GoogleDriveManager, creating it on first use.
+
+    All browser sessions share it, so credentials, the file ID cache and the
+    parsed discovery document are set up once per process.
+    """
+    global _drive_manager
+    with _drive_manager_lock:
+        if _drive_manager is None:
+            _drive_manager = GoogleDriveManager()
+        return _drive_manager
+
+
 if __name__ == "__main__":
     # Example usage:
     drive_manager = GoogleDriveManager()
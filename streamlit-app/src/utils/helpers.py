@@ -4,11 +4,13 @@ from io import BytesIO, StringIO
 import itertools
 import os
 import re
-import unicodedata
 from gtts import gTTS
 import pandas as pd
 import streamlit as st
 
+from utils.audio_cache import get_audio_cache
+from utils.normalization import get_normalizer
+
 
 # Language options with codes for gTTS compatibility
 LANGUAGE_OPTIONS = {
@@ -25,33 +27,14 @@ LANGUAGE_OPTIONS = {
 }
 
 
-def normalize_text(text):
+def normalize_text(text, language=None):
     """
-    Normalize text by removing accents, handling Turkish 'I's, and converting to lowercase.
+    Normalize text by removing accents, handling language specific letters
+    (e.g. Turkish 'I's, German 'ß') and converting to lowercase.
 
-    Specifically, this function:
-    - Maps Turkish 'I', 'İ', and 'ı' to 'i' to ensure consistent lowercase 'i' usage.
-    - Removes diacritical marks (accents) from characters.
-    - Converts the entire string to lowercase.
+    'language' is a code of LANGUAGE_OPTIONS; see utils.normalization.
     """
-    # Define a translation table for Turkish-specific characters
-    turkish_mapping = str.maketrans({
-        'I': 'i',   # Uppercase I (without dot) to lowercase i
-        'İ': 'i',   # Uppercase İ (with dot) to lowercase i
-        'ı': 'i',   # Lowercase ı (without dot) to lowercase i
-    })
-
-    # Apply the translation to handle Turkish 'I's
-    text = text.translate(turkish_mapping)
-
-    # Normalize the text to NFD to separate base characters and diacritics
-    text = unicodedata.normalize('NFD', text)
-
-    # Remove all combining characters (diacritics)
-    text = ''.join(char for char in text if not unicodedata.combining(char))
-
-    # Convert the text to lowercase
-    return text.lower()
+    return get_normalizer(language)(text)
 
 
 def compare_strings(a, b, tolerance, ignore_accents):
@@ -74,15 +57,17 @@ def compare_strings(a, b, tolerance, ignore_accents):
     return ratio * 100 >= tolerance, original_b, exact_match
 
 
+# Pattern to find text in parentheses
+PARENTHESES_PATTERN = re.compile(r'\(([^)]+)\)')
+
+
 def expand_parentheses(s):
     """
     Expand a string with optional text in parentheses into all possible combinations.
     E.g., "(the) food" -> ["food", "the food"]
     """
-    # Pattern to find text in parentheses
-    pattern = re.compile(r'\(([^)]+)\)')
     # Find all matches
-    matches = list(pattern.finditer(s))
+    matches = list(PARENTHESES_PATTERN.finditer(s))
     if not matches:
         return [s.strip()]
 
@@ -191,15 +176,29 @@ def get_exercises(user, exercises_dir):
     return files
 
 
+# Engine part of the audio cache key; change it when the synthesis settings change
+TTS_ENGINE = 'gtts'
+
+
+def synthesize_speech(text, language):
+    """
+    MP3 audio of 'text' spoken in 'language' (a gTTS language code). Served
+    from the audio cache when the clip was synthesized before.
+    """
+    cache = get_audio_cache()
+    audio_data = cache.get(text, language, TTS_ENGINE)
+    if audio_data is None:
+        fp = BytesIO()
+        gTTS(text=text, lang=language).write_to_fp(fp)
+        audio_data = fp.getvalue()
+        cache.put(text, language, TTS_ENGINE, audio_data)
+    return audio_data
+
+
 def tts_audio(word, language):
     """Generate Text-to-Speech audio and return HTML audio tag."""
     try:
-        tts = gTTS(text=word, lang=language)
-        fp = BytesIO()
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        audio_data = fp.read()
-        b64 = base64.b64encode(audio_data).decode()
+        b64 = base64.b64encode(synthesize_speech(word, language)).decode()
         audio_html = f'<audio autoplay="true" controls src="data:audio/mp3;base64,{b64}"></audio>'
         return audio_html
     except Exception as e:
@@ -0,0 +1,126 @@
+# src/utils/local_storage.py
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from utils.progress_cache import content_md5
+from utils.storage import FOLDER_MIME_TYPE, ProgressStorage
+
+DEFAULT_DB_PATH = os.getenv("PROGRESS_DB_PATH", "progress.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    name TEXT NOT NULL,
+    mime_type TEXT NOT NULL,
+    data BLOB,
+    md5 TEXT,
+    created_at REAL NOT NULL,
+    modified_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_parent_and_name ON files (parent_id, name);
+"""
+
+
+class LocalStorage(ProgressStorage):
+    """
+    Progress storage in a local SQLite database, for self-hosted deployments
+    and for running without any external service.
+
+    Folders and files share one table, mirroring Drive's model, so every
+    caller works the same on both backends.
+    """
+
+    root_folder_id = 'root'
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # One connection shared by all threads; the lock serializes its use
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def list_files_in_directory(self, folder_id):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, name, mime_type FROM files WHERE parent_id = ? ORDER BY created_at",
+                (folder_id,)
+            ).fetchall()
+        return [{'id': file_id, 'name': name, 'mimeType': mime_type} for file_id, name, mime_type in rows]
+
+    def get_file_id_by_name(self, folder_id, filename, mime_type=None):
+        query = "SELECT id FROM files WHERE parent_id = ? AND name = ?"
+        params = [folder_id, filename]
+        if mime_type:
+            query += " AND mime_type = ?"
+            params.append(mime_type)
+        with self._lock:
+            row = self._db.execute(query + " ORDER BY created_at LIMIT 1", params).fetchone()
+        return row[0] if row else None
+
+    def create_directory(self, name, parent_folder_id=None):
+        return self._insert(name, parent_folder_id, FOLDER_MIME_TYPE, None)
+
+    def upload_bytes(self, data, file_name, folder_id, mime_type='application/json', file_id=None):
+        if hasattr(data, 'getvalue'):
+            data = data.getvalue()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if not file_id:
+            return self._insert(file_name, folder_id, mime_type, data)
+
+        with self._lock, self._db:
+            updated = self._db.execute(
+                "UPDATE files SET data = ?, md5 = ?, mime_type = ?, modified_time = ? WHERE id = ?",
+                (data, content_md5(data), mime_type, _now(), file_id)
+            ).rowcount
+        if not updated:
+            raise FileNotFoundError(file_id)
+        return file_id
+
+    def get_file_metadata(self, file_id, fields='id, name, md5Checksum, modifiedTime'):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, name, mime_type, md5, modified_time FROM files WHERE id = ?", (file_id,)
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError(file_id)
+        metadata = dict(zip(('id', 'name', 'mimeType', 'md5Checksum', 'modifiedTime'), row))
+        wanted = {f.strip() for f in fields.split(',')}
+        return {key: value for key, value in metadata.items() if key in wanted and value is not None}
+
+    def download_bytes(self, file_id):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM files WHERE id = ?", (file_id,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(file_id)
+        return bytes(row[0] or b'')
+
+    def delete_file(self, file_id):
+        with self._lock, self._db:
+            deleted = self._db.execute("DELETE FROM files WHERE id = ?", (file_id,)).rowcount
+        if not deleted:
+            raise FileNotFoundError(file_id)
+
+    def _insert(self, name, parent_id, mime_type, data):
+        file_id = uuid.uuid4().hex
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO files (id, parent_id, name, mime_type, data, md5, created_at, modified_time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_id, parent_id, name, mime_type, data,
+                 content_md5(data) if data is not None else None, time.time(), _now())
+            )
+        return file_id
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,92 @@
+# src/utils/normalization.py
+
+import os
+import threading
+import unicodedata
+from functools import lru_cache
+
+# Number of distinct strings each language's normalizer remembers
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "4096"))
+
+# Turkish dotted and dotless i's all become 'i'. Applied for every language,
+# as normalize_text() always did.
+COMMON_FOLDS = {
+    'I': 'i',   # Uppercase I (without dot)
+    'İ': 'i',   # Uppercase İ (with dot)
+    'ı': 'i',   # Lowercase ı (without dot)
+}
+
+# Letters a language spells differently when typed without special keys,
+# keyed by the codes of LANGUAGE_OPTIONS
+LANGUAGE_FOLDS = {
+    'de': {'ß': 'ss', 'ẞ': 'ss'},
+    'nl': {'ĳ': 'ij', 'Ĳ': 'ij'},
+    'es': {'ñ': 'n', 'Ñ': 'n'},
+    'ru': {'ё': 'е', 'Ё': 'е'},
+}
+
+# Letters that look accented but are letters of their own, so accent removal keeps them
+LANGUAGE_KEPT_LETTERS = {
+    'ru': 'йЙ',
+}
+
+# Private use characters stand in for kept letters while accents are removed
+_PLACEHOLDER_START = 0xE000
+
+
+class Normalizer:
+    """
+    Accent and case folding for answers in one language.
+
+    The translation tables are built once; results are memoized, since the
+    same answers are normalized over and over during a session.
+    """
+
+    def __init__(self, language=None, cache_size=NORMALIZE_CACHE_SIZE):
+        self.language = language
+        folds = dict(COMMON_FOLDS)
+        folds.update(LANGUAGE_FOLDS.get(language, {}))
+        # Lowercase kept letters up front; their placeholders skip lower() later
+        kept = {letter: letter.lower() for letter in LANGUAGE_KEPT_LETTERS.get(language, '')}
+        placeholders = {}
+        for letter in dict.fromkeys(kept.values()):
+            placeholders[letter] = chr(_PLACEHOLDER_START + len(placeholders))
+        folds.update({letter: placeholders[lowered] for letter, lowered in kept.items()})
+        self._fold_table = str.maketrans(folds)
+        self._restore_table = str.maketrans({p: letter for letter, p in placeholders.items()})
+        self._cached = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _normalize(self, text):
+        # Language specific letters first, then strip diacritics from the decomposed text
+        text = unicodedata.normalize('NFD', text.translate(self._fold_table))
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+        return text.lower().translate(self._restore_table)
+
+    def __call__(self, text):
+        """Normalize one string."""
+        return self._cached(text)
+
+    def many(self, texts):
+        """Normalize a batch of strings, e.g. a whole word list column. Each distinct string is normalized once."""
+        normalized = {text: self._cached(text) for text in set(texts)}
+        return [normalized[text] for text in texts]
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+
+_normalizers = {}
+_normalizers_lock = threading.Lock()
+
+
+def get_normalizer(language=None):
+    """
+    Return the shared Normalizer of a language code (see LANGUAGE_OPTIONS).
+    Unknown codes and None get the language independent normalizer.
+    """
+    if language not in LANGUAGE_FOLDS and language not in LANGUAGE_KEPT_LETTERS:
+        language = None
+    with _normalizers_lock:
+        if language not in _normalizers:
+            _normalizers[language] = Normalizer(language)
+        return _normalizers[language]
@@ -0,0 +1,271 @@
+# src/utils/progress_cache.py
+
+import hashlib
+import json
+import os
+import threading
+
+from utils.storage import is_not_found, storage_errors
+
+DEFAULT_CACHE_DIR = os.getenv("PROGRESS_CACHE_DIR", "progress_cache")
+
+
+def content_md5(data):
+    """MD5 hex digest of file content, comparable to Drive's md5Checksum."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.md5(data).hexdigest()
+
+
+class ProgressCache:
+    """
+    Local write-through cache of progress files, with Drive as an asynchronous replica.
+
+    Every save is written here first and marked as pending until its upload
+    finishes. Each entry remembers the Drive file ID and the checksum Drive
+    had the last time the two were in sync, so a load only needs a metadata
+    request to decide whether the local copy can be served.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _base_path(self, folder_id, filename):
+        key = hashlib.sha1(f"{folder_id}/{filename}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, base_path):
+        try:
+            with open(base_path + '.meta.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, base_path, meta):
+        tmp_path = base_path + '.meta.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, base_path + '.meta.json')
+
+    def get(self, folder_id, filename):
+        """
+        Returns:
+            tuple or None: (content bytes, metadata dict) of the cached file.
+        """
+        base_path = self._base_path(folder_id, filename)
+        with self._lock:
+            meta = self._read_meta(base_path)
+            if meta is None:
+                return None
+            try:
+                with open(base_path + '.data', 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+        # Guard against a data file from a different write than its metadata
+        if content_md5(data) != meta.get('md5'):
+            return None
+        return data, meta
+
+    def write(self, folder_id, filename, data, pending=True, file_id=None, remote_md5=None):
+        """
+        Store new content for a file.
+
+        'pending' marks content that has not been replicated to Drive yet.
+        'remote_md5' is the checksum Drive is known to have, if any.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        base_path = self._base_path(folder_id, filename)
+        with self._lock:
+            old_meta = self._read_meta(base_path) or {}
+            meta = {
+                'folder_id': folder_id,
+                'filename': filename,
+                'md5': content_md5(data),
+                'pending': pending,
+                'file_id': file_id or old_meta.get('file_id'),
+                'remote_md5': remote_md5 if remote_md5 is not None else old_meta.get('remote_md5'),
+            }
+            tmp_path = base_path + '.data.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, base_path + '.data')
+            self._write_meta(base_path, meta)
+
+    def mark_replicated(self, folder_id, filename, file_id, md5):
+        """Record that content with checksum 'md5' now lives in Drive as 'file_id'."""
+        base_path = self._base_path(folder_id, filename)
+        with self._lock:
+            meta = self._read_meta(base_path)
+            if meta is None:
+                return
+            meta['file_id'] = file_id
+            meta['remote_md5'] = md5
+            # A newer local write may have happened while this upload was running
+            if meta['md5'] == md5:
+                meta['pending'] = False
+            self._write_meta(base_path, meta)
+
+    def discard(self, folder_id, filename):
+        """Forget the local copy of a file, e.g. a pending write that lost against another writer."""
+        base_path = self._base_path(folder_id, filename)
+        with self._lock:
+            for suffix in ('.meta.json', '.data'):
+                try:
+                    os.remove(base_path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def remote_changed(self, folder_id, filename, remote_md5, unknown=False):
+        """
+        True if storage holds a version of the file ('remote_md5') other than the
+        one this cache last saw there. 'unknown' is returned when the cache never
+        saw the file in storage.
+        """
+        if remote_md5 is None:
+            return False
+        with self._lock:
+            meta = self._read_meta(self._base_path(folder_id, filename))
+        known = meta.get('remote_md5') if meta else None
+        if known is None:
+            return unknown
+        return known != remote_md5
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_progress_cache():
+    """Return the process-wide ProgressCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProgressCache()
+        return _cache
+
+
+def read_progress_file(drive_manager, folder_id, filename, file_id=None, cache=None):
+    """
+    Read a progress file, serving it from the local cache whenever that is current.
+
+    The local copy is used if its checksum matches Drive's, or if it holds a
+    pending write made on top of the version Drive still has. Otherwise the
+    file is downloaded and the cache refreshed.
+
+    Returns:
+        bytes or None: The file content, or None if the file does not exist.
+    """
+    cache = cache or get_progress_cache()
+    cached = cache.get(folder_id, filename)
+    file_id = file_id or drive_manager.get_file_id_by_name(folder_id, filename)
+
+    if not file_id:
+        # Written here but not replicated yet
+        return cached[0] if cached and cached[1]['pending'] else None
+
+    remote_md5 = drive_manager.get_file_metadata(file_id).get('md5Checksum')
+    return _current_content(drive_manager, folder_id, filename, file_id, remote_md5, cached, cache)
+
+
+def read_progress_files(drive_manager, folder_id, filenames, cache=None):
+    """
+    read_progress_file() for several files of one folder. Name lookups and
+    metadata requests are batched, so only downloads cost a round trip each.
+
+    Returns:
+        dict: Content (or None) per file name.
+    """
+    cache = cache or get_progress_cache()
+    file_ids = drive_manager.get_file_ids_by_name(folder_id, filenames)
+    metadata = drive_manager.get_files_metadata([i for i in file_ids.values() if i])
+
+    stale = [name for name, file_id in file_ids.items() if file_id and metadata[file_id] is None]
+    if stale:
+        # Cached IDs of files that were deleted or replaced; look the names up again
+        for name in stale:
+            drive_manager.invalidate_file_id(folder_id, name)
+        file_ids.update(drive_manager.get_file_ids_by_name(folder_id, stale))
+        metadata.update(drive_manager.get_files_metadata([file_ids[n] for n in stale if file_ids[n]]))
+
+    contents = {}
+    for name in filenames:
+        cached = cache.get(folder_id, name)
+        file_id = file_ids.get(name)
+        if not file_id or metadata.get(file_id) is None:
+            contents[name] = cached[0] if cached and cached[1]['pending'] else None
+            continue
+        remote_md5 = metadata[file_id].get('md5Checksum')
+        contents[name] = _current_content(drive_manager, folder_id, name, file_id, remote_md5, cached, cache)
+    return contents
+
+
+def _current_content(drive_manager, folder_id, filename, file_id, remote_md5, cached, cache):
+    """Serve 'cached' if it is current with respect to the remote checksum, otherwise download."""
+    if cached:
+        data, meta = cached
+        if meta['md5'] == remote_md5:
+            return data
+        if meta['pending'] and meta.get('remote_md5') == remote_md5:
+            return data
+
+    data = drive_manager.download_bytes(file_id)
+    cache.write(folder_id, filename, data, pending=False, file_id=file_id, remote_md5=content_md5(data))
+    return data
+
+
+class ProgressFileReader:
+    """
+    Reads the progress files of one folder by name; used as a PracticeSession shard reader.
+
+    'preloaded' maps file names to content read earlier (e.g. by a login
+    prefetch). Each preloaded file is served once without a storage request.
+    """
+
+    def __init__(self, drive_manager, folder_id, preloaded=None):
+        self.drive_manager = drive_manager
+        self.folder_id = folder_id
+        self.preloaded = dict(preloaded or {})
+
+    def __call__(self, filename):
+        return self.read_many([filename])[filename]
+
+    def read_many(self, filenames):
+        contents = {name: self.preloaded.pop(name) for name in filenames if name in self.preloaded}
+        missing = [name for name in filenames if name not in contents]
+        if missing:
+            contents.update(read_progress_files(self.drive_manager, self.folder_id, missing))
+        return contents
+
+
+def replicate_progress_file(drive_manager, folder_id, filename, payload, cache=None):
+    """
+    Upload a progress file to storage, overwriting the existing file of that name,
+    and record the replication in the local cache.
+
+    Returns:
+        str: The file ID.
+    """
+    cache = cache or get_progress_cache()
+    existing_file_id = drive_manager.get_file_id_by_name(folder_id, filename)
+    file_id = None
+
+    if existing_file_id:
+        # Update existing file
+        try:
+            file_id = drive_manager.upload_bytes(payload, filename, folder_id, file_id=existing_file_id)
+        except storage_errors() as e:
+            if not is_not_found(e):
+                raise
+            # The cached ID points to a file that no longer exists; create it again
+            drive_manager.invalidate_file_id(folder_id, filename)
+
+    if file_id is None:
+        # Create a new file
+        file_id = drive_manager.upload_bytes(payload, filename, folder_id)
+
+    cache.mark_replicated(folder_id, filename, file_id, content_md5(payload))
+    return file_id
@@ -0,0 +1,144 @@
+# src/utils/progress_journal.py
+
+import hashlib
+import json
+import os
+import uuid
+from collections import namedtuple
+
+PROGRESS_SUFFIX = '_progress.json'
+JOURNAL_SUFFIX = '_journal.jsonl'
+
+# Number of journal events after which the next save writes a fresh snapshot
+DEFAULT_COMPACTION_INTERVAL = 50
+
+
+def progress_filename(exercise_name):
+    """Name of the full snapshot file for an exercise."""
+    return f"{exercise_name}{PROGRESS_SUFFIX}"
+
+
+def journal_filename(exercise_name):
+    """Name of the append-only journal file for an exercise."""
+    return f"{exercise_name}{JOURNAL_SUFFIX}"
+
+
+def journal_filename_for(progress_file_name):
+    """Map a '<exercise>_progress.json' file name to its journal file name."""
+    if progress_file_name.endswith(PROGRESS_SUFFIX):
+        return progress_file_name[:-len(PROGRESS_SUFFIX)] + JOURNAL_SUFFIX
+    return os.path.splitext(progress_file_name)[0] + JOURNAL_SUFFIX
+
+
+def new_snapshot_id():
+    return uuid.uuid4().hex
+
+
+def new_event_id():
+    return uuid.uuid4().hex[:16]
+
+
+def event_id(event):
+    """Identity of a journal event: its id, or a hash of its content for events recorded before ids existed."""
+    if 'id' in event:
+        return event['id']
+    return hashlib.md5(json.dumps(event, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def merge_events(events, other_events):
+    """'events' followed by the events of 'other_events' that are not in it yet."""
+    seen = {event_id(event) for event in events}
+    return list(events) + [event for event in other_events if event_id(event) not in seen]
+
+
+# What a save hands to the uploader: the journal of the current snapshot, and its lineage, i.e. the
+# snapshot it was compacted from and the events folded into it (their ids, and the events themselves
+# if the compaction happened in this process)
+JournalState = namedtuple(
+    "JournalState", ["snapshot_id", "events", "base_snapshot_id", "folded_ids", "folded_events", "text"]
+)
+
+
+class ProgressJournal:
+    """
+    Append-only log of the session mutations made since the last full snapshot.
+
+    The journal is stored as JSON lines: a header line holding the id of the
+    snapshot it applies to, followed by one line per event. Each event is
+    serialized exactly once, so recording an answer costs the same no matter
+    how long the history is.
+
+    Every event carries an id, so journals written concurrently by several
+    devices can be merged without duplicating events.
+    """
+
+    def __init__(self, snapshot_id=None, compaction_interval=DEFAULT_COMPACTION_INTERVAL):
+        self.compaction_interval = compaction_interval
+        self.reset(snapshot_id)
+
+    def reset(self, snapshot_id=None, base_snapshot_id=None, folded_ids=()):
+        """
+        Start a new, empty journal on top of the given snapshot. 'base_snapshot_id'
+        and 'folded_ids' are the lineage of that snapshot, as recorded in its index.
+        """
+        self.snapshot_id = snapshot_id or new_snapshot_id()
+        self.base_snapshot_id = base_snapshot_id
+        self.folded_ids = tuple(folded_ids)
+        self.folded_events = ()
+        self.events = []
+        self._lines = [json.dumps({'snapshot_id': self.snapshot_id})]
+
+    def compact(self):
+        """Start a new snapshot on top of the current one, whose events are folded into it."""
+        base_snapshot_id, folded_events = self.snapshot_id, tuple(self.events)
+        self.reset(base_snapshot_id=base_snapshot_id, folded_ids=[event_id(event) for event in folded_events])
+        self.folded_events = folded_events
+
+    def state(self):
+        """The current journal and its lineage, for the uploader (see JournalState)."""
+        return JournalState(
+            self.snapshot_id, tuple(self.events), self.base_snapshot_id,
+            self.folded_ids, self.folded_events, self.serialize()
+        )
+
+    def append(self, event):
+        """Record a single event, giving it an id if it has none."""
+        event.setdefault('id', new_event_id())
+        self.events.append(event)
+        self._lines.append(json.dumps(event, ensure_ascii=False))
+        return event
+
+    def needs_compaction(self):
+        return len(self.events) >= self.compaction_interval
+
+    def serialize(self):
+        """Return the full journal (header plus events) as JSON lines."""
+        return '\n'.join(self._lines) + '\n'
+
+    @staticmethod
+    def format(snapshot_id, events):
+        """Serialize a journal given as a snapshot id and a list of events."""
+        lines = [json.dumps({'snapshot_id': snapshot_id})]
+        lines.extend(json.dumps(event, ensure_ascii=False) for event in events)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def parse(text):
+        """
+        Parse serialized journal text.
+
+        Returns:
+            tuple: (snapshot_id, list of events). snapshot_id is None if the text is empty.
+        """
+        lines = [line for line in text.splitlines() if line.strip()]
+        if not lines:
+            return None, []
+        header = json.loads(lines[0])
+        events = []
+        for line in lines[1:]:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted write; everything before it is valid
+                break
+        return header.get('snapshot_id'), events
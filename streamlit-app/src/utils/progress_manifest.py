@@ -0,0 +1,104 @@
+# src/utils/progress_manifest.py
+
+import json
+import threading
+
+from utils.progress_cache import get_progress_cache, read_progress_file, replicate_progress_file
+from utils.progress_journal import PROGRESS_SUFFIX, progress_filename
+from utils.upload_scheduler import get_upload_scheduler
+
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Entries staged by save_progress_data and not yet merged into the stored manifest, per user folder
+_pending_entries = {}
+_pending_lock = threading.Lock()
+
+
+def load_manifest(drive_manager, folder_id):
+    """
+    Read the manifest of a user folder.
+
+    Returns:
+        dict or None: Manifest entries keyed by exercise name, or None if the folder has no manifest.
+    """
+    data = read_progress_file(drive_manager, folder_id, MANIFEST_FILENAME)
+    if data is None:
+        return None
+    return json.loads(data).get('exercises', {})
+
+
+def manifest_from_listing(files):
+    """Build minimal manifest entries from a folder listing, for folders without a manifest."""
+    entries = {}
+    for f in files:
+        if f['name'].endswith(PROGRESS_SUFFIX):
+            exercise_name = f['name'][:-len(PROGRESS_SUFFIX)]
+            entries[exercise_name] = {
+                'exercise_name': exercise_name,
+                'progress_file': f['name'],
+                'file_id': f['id'],
+            }
+    return entries
+
+
+def update_manifest(drive_manager, folder_id, entries):
+    """
+    Merge manifest entries (dicts with at least 'exercise_name') into the
+    folder's manifest. The stored manifest is rewritten in the background.
+    """
+    with _pending_lock:
+        pending = _pending_entries.setdefault(folder_id, {})
+        for entry in entries:
+            pending.setdefault(entry['exercise_name'], {}).update(entry)
+
+    get_upload_scheduler().submit(
+        (folder_id, MANIFEST_FILENAME),
+        _write_manifest,
+        drive_manager,
+        folder_id
+    )
+
+
+def _write_manifest(drive_manager, folder_id):
+    """Fold all staged entries into the manifest and upload it. Runs on the manifest's upload lane."""
+    with _pending_lock:
+        pending = _pending_entries.pop(folder_id, {})
+    if not pending:
+        return
+    try:
+        _fold_into_manifest(drive_manager, folder_id, pending)
+    except Exception:
+        # Keep the entries for the retry or the next update; newer entries win
+        with _pending_lock:
+            newer = _pending_entries.get(folder_id, {})
+            for exercise_name, entry in newer.items():
+                pending.setdefault(exercise_name, {}).update(entry)
+            _pending_entries[folder_id] = pending
+        raise
+
+
+def _fold_into_manifest(drive_manager, folder_id, pending):
+    # This process is the manifest's writer, so a local copy is trusted without a Drive round trip
+    cache = get_progress_cache()
+    cached = cache.get(folder_id, MANIFEST_FILENAME)
+    if cached:
+        exercises = json.loads(cached[0]).get('exercises', {})
+    else:
+        exercises = load_manifest(drive_manager, folder_id) or {}
+    for exercise_name, entry in pending.items():
+        exercises.setdefault(exercise_name, {}).update(entry)
+
+    # The progress file ID is only known once its first upload has finished
+    unresolved = {
+        name: entry.get('progress_file', progress_filename(name))
+        for name, entry in exercises.items() if name in pending and not entry.get('file_id')
+    }
+    if unresolved:
+        file_ids = drive_manager.get_file_ids_by_name(folder_id, list(unresolved.values()))
+        for name, progress_file in unresolved.items():
+            exercises[name]['file_id'] = file_ids[progress_file]
+
+    payload = json.dumps({'schema_version': MANIFEST_VERSION, 'exercises': exercises}, ensure_ascii=False)
+    cache.write(folder_id, MANIFEST_FILENAME, payload)
+    replicate_progress_file(drive_manager, folder_id, MANIFEST_FILENAME, payload, cache=cache)
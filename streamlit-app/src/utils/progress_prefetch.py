@@ -0,0 +1,109 @@
+# src/utils/progress_prefetch.py
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+
+from utils.progress_cache import content_md5, get_progress_cache, read_progress_files
+from utils.progress_journal import journal_filename_for, progress_filename
+from utils.progress_manifest import load_manifest, manifest_from_listing
+from utils.progress_shards import EXERCISE_SHARD, LISTS_SHARD, SHARDED_SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Load the most recently practiced exercise right after login instead of showing the menu first
+AUTO_RESUME = os.getenv("PROGRESS_AUTO_RESUME", "").lower() in ("1", "true", "yes")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@dataclass
+class PrefetchedProgress:
+    """What a login prefetch found: the user's manifest and the files of their latest exercise."""
+    folder_id: str
+    exercises: dict = field(default_factory=dict)
+    latest_exercise: str = None
+    contents: dict = field(default_factory=dict)
+
+    def files_for(self, exercise_name):
+        """
+        Prefetched {file name: content} of an exercise, or {} if it was not prefetched.
+        Files saved locally since the prefetch are left out, so they are read again.
+        """
+        if exercise_name != self.latest_exercise:
+            return {}
+        cache = get_progress_cache()
+        files = {}
+        for name, data in self.contents.items():
+            cached = cache.get(self.folder_id, name)
+            cached_md5 = cached[1]['md5'] if cached else None
+            if cached_md5 == (content_md5(data) if data is not None else None):
+                files[name] = data
+        return files
+
+
+def latest_exercise(exercises):
+    """Name of the manifest entry practiced last, or None if no entry records when it was practiced."""
+    dated = [name for name, entry in exercises.items() if entry.get('last_modified')]
+    if not dated:
+        return None
+    return max(dated, key=lambda name: exercises[name]['last_modified'])
+
+
+def prefetch_progress(drive_manager, folder_id):
+    """
+    Read the manifest and the latest exercise's snapshot, journal and eagerly
+    loaded shards, in two batches. Everything read also lands in the local
+    progress cache.
+
+    Returns:
+        PrefetchedProgress
+    """
+    exercises = load_manifest(drive_manager, folder_id)
+    if exercises is None:
+        exercises = manifest_from_listing(drive_manager.list_files_in_directory(folder_id))
+    prefetched = PrefetchedProgress(folder_id, exercises, latest_exercise(exercises))
+    if prefetched.latest_exercise is None:
+        return prefetched
+
+    entry = exercises[prefetched.latest_exercise]
+    progress_file = entry.get('progress_file', progress_filename(prefetched.latest_exercise))
+    contents = read_progress_files(drive_manager, folder_id, [progress_file, journal_filename_for(progress_file)])
+
+    index = json.loads(contents[progress_file]) if contents[progress_file] else {}
+    if index.get('schema_version', 1) >= SHARDED_SCHEMA_VERSION:
+        shards = index.get('shards', {})
+        eager = [shards[key]['file'] for key in (EXERCISE_SHARD, LISTS_SHARD) if key in shards]
+        contents.update(read_progress_files(drive_manager, folder_id, eager))
+
+    prefetched.contents = contents
+    return prefetched
+
+
+def start_prefetch(drive_manager, folder_id):
+    """Run prefetch_progress() in the background. Returns a Future of its PrefetchedProgress."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="progress-prefetch")
+    return _executor.submit(prefetch_progress, drive_manager, folder_id)
+
+
+def prefetched_result(future, timeout=0):
+    """
+    The PrefetchedProgress of a prefetch, waiting at most 'timeout' seconds.
+    Returns None if there is no prefetch, it is still running or it failed.
+    """
+    if future is None:
+        return None
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        return None
+    except Exception:
+        logger.exception("Progress prefetch failed.")
+        return None
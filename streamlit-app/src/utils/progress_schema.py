@@ -0,0 +1,100 @@
+# src/utils/progress_schema.py
+
+# Version 1 files (no 'schema_version' key) store every word list as full word pair dicts.
+# Version 2 files store each word pair once in a table and refer to it by its row index.
+PROGRESS_SCHEMA_VERSION = 2
+
+
+class WordTable:
+    """
+    The single table of word pairs of an exercise.
+
+    Word pairs are identified by their row index. decode() always returns the
+    same dict object for an id, so decoded word lists share their word pairs
+    instead of holding copies.
+    """
+
+    def __init__(self, columns=None, rows=None):
+        self.columns = list(columns or [])
+        self.rows = [list(row) for row in (rows or [])]
+        self._pairs = [dict(zip(self.columns, row)) for row in self.rows]
+        self._ids = {}
+        for word_id, row in enumerate(self.rows):
+            self._ids.setdefault(self._key(row), word_id)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from a list of word pair dicts (DataFrame.to_dict('records'))."""
+        columns = list(records[0].keys()) if records else []
+        return cls(columns, [[record.get(c) for c in columns] for record in records])
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('columns', []), data.get('rows', []))
+
+    def to_dict(self):
+        return {'columns': self.columns, 'rows': self.rows}
+
+    def records(self):
+        """All word pairs, in table order."""
+        return list(self._pairs)
+
+    @staticmethod
+    def _key(values):
+        return tuple(str(v) for v in values)
+
+    def id_of(self, word_pair):
+        """Return the id of a word pair, or None if it is not part of the table."""
+        if not isinstance(word_pair, dict) or set(word_pair) != set(self.columns):
+            return None
+        return self._ids.get(self._key(word_pair.get(c) for c in self.columns))
+
+    def encode(self, word_pair):
+        """Encode a word pair as its id; pairs outside the table are kept inline."""
+        word_id = self.id_of(word_pair)
+        return word_pair if word_id is None else word_id
+
+    def decode(self, value):
+        if isinstance(value, int) and 0 <= value < len(self._pairs):
+            return self._pairs[value]
+        return value
+
+    def encode_list(self, word_pairs):
+        return [self.encode(word_pair) for word_pair in word_pairs]
+
+    def decode_list(self, values):
+        return [self.decode(value) for value in values]
+
+    def encode_entry(self, entry, question_column=None, answer_column=None):
+        """
+        Encode a progress entry. The word pair is replaced by its id, and the
+        question and correct answer are dropped when they can be derived from
+        the word pair and the direction.
+        """
+        if 'word_pair' not in entry:
+            return entry
+        word_pair = entry['word_pair']
+        encoded = {k: v for k, v in entry.items() if k != 'word_pair'}
+        word_id = self.id_of(word_pair)
+        if word_id is None:
+            encoded['word_pair'] = word_pair
+            return encoded
+        encoded['word_id'] = word_id
+        if question_column and encoded.get('question') == word_pair.get(question_column):
+            del encoded['question']
+        if answer_column and encoded.get('correct_answer') == word_pair.get(answer_column):
+            del encoded['correct_answer']
+        return encoded
+
+    def decode_entry(self, entry, question_column=None, answer_column=None):
+        """Inverse of encode_entry()."""
+        if 'word_id' not in entry:
+            return entry
+        word_pair = self.decode(entry['word_id'])
+        decoded = {k: v for k, v in entry.items() if k != 'word_id'}
+        if question_column and 'question' not in decoded:
+            decoded['question'] = word_pair.get(question_column)
+        if answer_column and 'correct_answer' not in decoded:
+            decoded['correct_answer'] = word_pair.get(answer_column)
+        decoded['word_pair'] = word_pair
+        return decoded
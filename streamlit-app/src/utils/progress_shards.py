@@ -0,0 +1,376 @@
+# src/utils/progress_shards.py
+
+import json
+import logging
+import threading
+
+from utils.progress_cache import content_md5, get_progress_cache, replicate_progress_file
+from utils.progress_journal import ProgressJournal, event_id, journal_filename_for, merge_events
+from utils.upload_scheduler import get_upload_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Version 3 progress files are a small index; the data lives in separately stored shards
+SHARDED_SCHEMA_VERSION = 3
+
+EXERCISE_SHARD = 'exercise'  # the word table
+LISTS_SHARD = 'lists'        # mistakes / context word lists of every direction
+
+# Uploads staged per exercise, keyed by (folder_id, index filename)
+_pending_snapshots = {}
+_pending_lock = threading.Lock()
+
+# Per exercise: ids of the journal events this process got into storage, the lineage
+# (snapshot id, base snapshot id, folded event ids) of the stored index, the journal this
+# process last stored (md5, snapshot id, event ids), and how often another writer's
+# changes were merged into the stored files
+_landed_events = {}
+_landed_lineage = {}
+_landed_journals = {}
+_remote_merges = {}
+
+
+def set_shard_key(kind, direction):
+    """Shard key of the practice set of the given kind and direction."""
+    return f"{kind}/{direction}"
+
+
+def shard_filename(exercise_name, shard_key):
+    return f"{exercise_name}__{shard_key.replace('/', '__')}.json"
+
+
+def archive_filename(exercise_name, shard_key, chunk):
+    """Name of a cold archive file of progress entries rolled up out of a set shard."""
+    return f"{exercise_name}__{shard_key.replace('/', '__')}__archive_{chunk}.json"
+
+
+class LazySetDict(dict):
+    """
+    A dict of PracticeSets whose values are read from storage on first access.
+
+    Keys are known up front (from the index), so membership tests and key
+    listings never trigger a load.
+    """
+
+    def __init__(self, loader, keys=()):
+        super().__init__((key, None) for key in keys)
+        self._loader = loader
+
+    def _ensure(self, key):
+        value = super().__getitem__(key)
+        if value is None:
+            value = self._loader(key)
+            super().__setitem__(key, value)
+        return value
+
+    def __getitem__(self, key):
+        return self._ensure(key)
+
+    def get(self, key, default=None):
+        return self._ensure(key) if key in self else default
+
+    def values(self):
+        return [self._ensure(key) for key in self]
+
+    def items(self):
+        return [(key, self._ensure(key)) for key in self]
+
+    def is_loaded(self, key):
+        return super().get(key) is not None
+
+
+def is_loaded(sets, key):
+    """True if the set for 'key' is in memory (always the case for plain dicts)."""
+    if isinstance(sets, LazySetDict):
+        return sets.is_loaded(key)
+    return key in sets
+
+
+def stage_snapshot(drive_manager, folder_id, index_filename, shard_payloads, index_payload, journal_state,
+                   replace=False):
+    """
+    Write changed shards and the index to the local cache and schedule their upload.
+
+    All files of an exercise are uploaded on the index's lane: shards first,
+    then the index, then the journal, so storage never holds an index that
+    points at shard versions it does not have yet. Shards staged by a
+    coalesced older snapshot are kept.
+
+    'journal_state' is the JournalState right after the compaction that
+    produced this snapshot; its lineage is recorded in the uploaded index.
+
+    With 'replace' (a restarted exercise or an uploaded file), the snapshot
+    overwrites whatever storage holds instead of being merged with it.
+    """
+    cache = get_progress_cache()
+    for filename, payload in shard_payloads.items():
+        cache.write(folder_id, filename, payload)
+    cache.write(folder_id, index_filename, index_payload)
+    return _stage(drive_manager, folder_id, index_filename, {
+        'shards': dict(shard_payloads), 'index': index_payload, 'snapshot': journal_state, 'journal': None,
+        'replace': replace,
+    })
+
+
+def stage_journal(drive_manager, folder_id, index_filename, journal_state):
+    """Write the journal to the local cache and schedule its upload on the exercise's lane."""
+    get_progress_cache().write(folder_id, journal_filename_for(index_filename), journal_state.text)
+    return _stage(drive_manager, folder_id, index_filename, {
+        'shards': {}, 'index': None, 'snapshot': None, 'journal': journal_state, 'replace': False,
+    })
+
+
+def remote_merge_count(folder_id, index_filename):
+    """
+    Number of times another writer's changes were merged into the stored
+    files of an exercise. A session that saw a lower count should reload.
+    """
+    with _pending_lock:
+        return _remote_merges.get((folder_id, index_filename), 0)
+
+
+def is_staged(folder_id, index_filename):
+    """True if some of the exercise's changes still wait for upload (or for a retry)."""
+    with _pending_lock:
+        return (folder_id, index_filename) in _pending_snapshots
+
+
+def _stage(drive_manager, folder_id, index_filename, staged):
+    key = (folder_id, index_filename)
+    with _pending_lock:
+        if key in _pending_snapshots:
+            staged = _combine(_pending_snapshots[key], staged)
+        _pending_snapshots[key] = staged
+    get_upload_scheduler().submit(key, _write_staged, drive_manager, folder_id, index_filename)
+    return key
+
+
+def _combine(older, newer):
+    """Fold a newer staged upload into an older one that has not been uploaded yet."""
+    snapshot = newer['snapshot'] or older['snapshot']
+    if older['snapshot'] and newer['snapshot'] and older['index'] is not None:
+        # The older index never reached storage, so the newer one inherits its lineage
+        snapshot = newer['snapshot']._replace(
+            base_snapshot_id=older['snapshot'].base_snapshot_id,
+            folded_ids=older['snapshot'].folded_ids + newer['snapshot'].folded_ids,
+            folded_events=older['snapshot'].folded_events + newer['snapshot'].folded_events,
+        )
+    # A newer snapshot folds in the older journal
+    journal = newer['journal'] if newer['journal'] or newer['index'] is not None else older['journal']
+    if older['journal'] and journal is not older['journal']:
+        # Both may come from different sessions of the exercise; keep the older one's events too
+        target = journal or (snapshot if newer['index'] is not None else None)
+        carried = _carry_events(older['journal'], target) if target is not None else None
+        if carried is not target:
+            journal = carried
+    return {
+        'shards': {**older['shards'], **newer['shards']},
+        'index': newer['index'] if newer['index'] is not None else older['index'],
+        'snapshot': snapshot,
+        'journal': journal,
+        # A replace that has not landed yet still has to overwrite storage
+        'replace': older['replace'] or newer['replace'],
+    }
+
+
+def _carry_events(older, newer):
+    """
+    The JournalState 'newer' plus the events of 'older' it neither holds nor
+    folded into its snapshot. Returns 'newer' itself if there are none, as
+    for two saves of the same session.
+    """
+    known = {event_id(event) for event in newer.events}
+    if older.snapshot_id == newer.snapshot_id:
+        missing = [e for e in older.events if event_id(e) not in known]
+    elif older.snapshot_id == newer.base_snapshot_id:
+        known.update(newer.folded_ids)
+        missing = [e for e in older.events if event_id(e) not in known]
+    else:
+        missing = []
+    if not missing:
+        return newer
+    events = newer.events + tuple(missing)
+    return newer._replace(events=events, text=ProgressJournal.format(newer.snapshot_id, events))
+
+
+def _journal_is_covered(key, journal, remote_md5):
+    """
+    True if storage holds the journal this process last stored ('remote_md5'
+    is its checksum) and every event of it is in 'journal' or folded into its
+    snapshot, so overwriting it loses nothing.
+
+    This is checked against the journal itself rather than the progress
+    cache, which all sessions of the process share: another session of the
+    same exercise may have stored events this one never saw.
+    """
+    with _pending_lock:
+        landed = _landed_journals.get(key)
+    if landed is None or landed[0] != remote_md5:
+        return False
+    md5, snapshot_id, ids = landed
+    if snapshot_id == journal.snapshot_id:
+        return ids <= {event_id(event) for event in journal.events}
+    if snapshot_id == journal.base_snapshot_id:
+        return ids <= set(journal.folded_ids)
+    return False
+
+
+def _write_staged(drive_manager, folder_id, index_filename):
+    key = (folder_id, index_filename)
+    with _pending_lock:
+        staged = _pending_snapshots.pop(key, None)
+    if not staged:
+        return
+
+    try:
+        _replicate(drive_manager, folder_id, index_filename, staged)
+    except Exception:
+        # Put back what did not make it (_replicate removes what it uploaded), under anything staged since
+        with _pending_lock:
+            if key in _pending_snapshots:
+                _pending_snapshots[key] = _combine(staged, _pending_snapshots[key])
+            elif staged['shards'] or staged['index'] is not None or staged['journal']:
+                _pending_snapshots[key] = staged
+        raise
+
+
+def _replicate(drive_manager, folder_id, index_filename, staged):
+    """
+    Upload a staged exercise, guarded against concurrent writers.
+
+    The files' current checksums are fetched in one batch and compared with the
+    versions this process last saw. If another writer replaced the index or a
+    shard, this snapshot is dropped and its events are merged into the other
+    writer's journal instead (see _rebase()). If only the journal changed,
+    the other writer's events are merged into ours. Drive has no conditional
+    update, so this narrows the window for lost updates rather than closing it.
+
+    A staged replace skips the check and starts the exercise's history afresh.
+    """
+    key = (folder_id, index_filename)
+    cache = get_progress_cache()
+    if staged['replace']:
+        with _pending_lock:
+            for landed in (_landed_events, _landed_lineage, _landed_journals):
+                landed.pop(key, None)
+    journal_file = journal_filename_for(index_filename)
+    names = list(staged['shards']) + [index_filename, journal_file]
+
+    file_ids = drive_manager.get_file_ids_by_name(folder_id, names)
+    metadata = drive_manager.get_files_metadata([file_id for file_id in file_ids.values() if file_id])
+    remote_md5 = {name: (metadata.get(file_ids[name]) or {}).get('md5Checksum') for name in names}
+
+    # The snapshot our staged changes build on, and the one storage holds as far as we know
+    if staged['index'] is not None:
+        generation = staged['snapshot'].base_snapshot_id
+    else:
+        generation = staged['journal'].snapshot_id
+    with _pending_lock:
+        stored = _landed_lineage.get(key)
+    changed = any(cache.remote_changed(folder_id, name, remote_md5[name]) for name in names if name != journal_file)
+    if not staged['replace'] and (changed or (stored is not None and stored[0] != generation)):
+        _rebase(drive_manager, folder_id, index_filename, staged, file_ids)
+        return
+
+    for filename, payload in list(staged['shards'].items()):
+        replicate_progress_file(drive_manager, folder_id, filename, payload, cache=cache)
+        del staged['shards'][filename]
+
+    if staged['index'] is not None:
+        snapshot = staged['snapshot']
+        index = json.loads(staged['index'])
+        index['base_snapshot_id'] = snapshot.base_snapshot_id
+        index['folded_event_ids'] = list(snapshot.folded_ids)
+        payload = json.dumps(index, ensure_ascii=False)
+        cache.write(folder_id, index_filename, payload)
+        replicate_progress_file(drive_manager, folder_id, index_filename, payload, cache=cache)
+        with _pending_lock:
+            _landed_events.setdefault(key, set()).update(snapshot.folded_ids)
+            _landed_lineage[key] = (snapshot.snapshot_id, snapshot.base_snapshot_id, set(snapshot.folded_ids))
+        staged['index'] = None
+        staged['replace'] = False
+
+    journal = staged['journal']
+    if journal is None:
+        return
+    payload = journal.text
+    events = journal.events
+    # Merge the stored journal's tail unless it is one we know to be part of ours
+    remote_journal_md5 = remote_md5[journal_file]
+    if (remote_journal_md5 is not None and remote_journal_md5 != content_md5(payload)
+            and not _journal_is_covered(key, journal, remote_journal_md5)):
+        remote_id, remote_events = ProgressJournal.parse(
+            drive_manager.download_bytes(file_ids[journal_file]).decode('utf-8')
+        )
+        with _pending_lock:
+            lineage = _landed_lineage.get(key)
+        if lineage is None:
+            lineage = (journal.snapshot_id, journal.base_snapshot_id, set(journal.folded_ids))
+        if remote_id == journal.snapshot_id:
+            events = merge_events(remote_events, events)
+        elif remote_id is not None and remote_id == lineage[1]:
+            # Written on top of the snapshot we compacted; keep what our compaction did not fold in
+            events = merge_events([e for e in remote_events if event_id(e) not in lineage[2]], events)
+        if len(events) > len(journal.events):
+            logger.info("Merged %d event(s) of another writer into %s.", len(events) - len(journal.events), journal_file)
+            payload = ProgressJournal.format(journal.snapshot_id, events)
+            cache.write(folder_id, journal_file, payload)
+            with _pending_lock:
+                _remote_merges[key] = _remote_merges.get(key, 0) + 1
+
+    replicate_progress_file(drive_manager, folder_id, journal_file, payload, cache=cache)
+    with _pending_lock:
+        _landed_events.setdefault(key, set()).update(event_id(event) for event in events)
+        _landed_journals[key] = (content_md5(payload), journal.snapshot_id, {event_id(event) for event in events})
+    staged['journal'] = None
+
+
+def _rebase(drive_manager, folder_id, index_filename, staged, file_ids):
+    """
+    Another writer stored a snapshot since this process last saw the exercise.
+    Drop the staged snapshot and append our events that are not in storage yet
+    to the other writer's journal, so both sides' answers survive. Changes that
+    are not events (resets, settings) are lost to the other writer's snapshot.
+    """
+    key = (folder_id, index_filename)
+    cache = get_progress_cache()
+    journal_file = journal_filename_for(index_filename)
+
+    index_data = drive_manager.download_bytes(file_ids[index_filename])
+    cache.write(folder_id, index_filename, index_data, pending=False,
+                file_id=file_ids[index_filename], remote_md5=content_md5(index_data))
+    for filename in staged['shards']:
+        cache.discard(folder_id, filename)
+    index = json.loads(index_data)
+    folded = set(index.get('folded_event_ids', []))
+
+    remote_id, remote_events = None, []
+    if file_ids.get(journal_file):
+        remote_id, remote_events = ProgressJournal.parse(
+            drive_manager.download_bytes(file_ids[journal_file]).decode('utf-8')
+        )
+    if remote_id == index.get('snapshot_id'):
+        events = remote_events
+    elif remote_id is not None and remote_id == index.get('base_snapshot_id'):
+        events = [e for e in remote_events if event_id(e) not in folded]
+    else:
+        events = []
+
+    ours = list(staged['snapshot'].folded_events) if staged['snapshot'] and staged['index'] is not None else []
+    if staged['journal']:
+        ours += staged['journal'].events
+    with _pending_lock:
+        landed = _landed_events.get(key, set())
+        ours = [e for e in ours if event_id(e) not in landed and event_id(e) not in folded]
+    events = merge_events(events, ours)
+    logger.info("%s was changed by another writer; merged %d event(s) into its journal.", index_filename, len(ours))
+
+    payload = ProgressJournal.format(index.get('snapshot_id'), events)
+    cache.write(folder_id, journal_file, payload)
+    replicate_progress_file(drive_manager, folder_id, journal_file, payload, cache=cache)
+    with _pending_lock:
+        _landed_events.setdefault(key, set()).update(event_id(event) for event in ours)
+        _landed_lineage[key] = (index.get('snapshot_id'), index.get('base_snapshot_id'), folded)
+        _landed_journals[key] = (content_md5(payload), index.get('snapshot_id'), {event_id(e) for e in events})
+        _remote_merges[key] = _remote_merges.get(key, 0) + 1
+    staged.update(shards={}, index=None, journal=None)
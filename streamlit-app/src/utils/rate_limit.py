@@ -0,0 +1,72 @@
+# src/utils/rate_limit.py
+
+import os
+import threading
+import time
+
+# Drive allows a service account about 3 sustained writes per second; bursts are absorbed by the bucket
+DRIVE_WRITE_RATE = float(os.getenv("DRIVE_WRITE_RATE", "3"))
+DRIVE_WRITE_BURST = float(os.getenv("DRIVE_WRITE_BURST", "10"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: 'rate' tokens per second, holding at most 'capacity'.
+
+    acquire() blocks until enough tokens are available, so all callers
+    together stay within the rate however many threads they run on.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'acquired': 0, 'waits': 0, 'total_wait': 0.0}
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens=1):
+        """
+        Take 'tokens' tokens, waiting for them if necessary.
+        Requests larger than the capacity are admitted once the bucket is full.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        needed = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    self._stats['acquired'] += tokens
+                    if waited:
+                        self._stats['waits'] += 1
+                        self._stats['total_wait'] += waited
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def metrics(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return dict(self._stats, tokens=self._tokens)
+
+
+_drive_write_bucket = None
+_drive_write_bucket_lock = threading.Lock()
+
+
+def get_drive_write_bucket():
+    """Return the process-wide bucket that all Drive writes draw from."""
+    global _drive_write_bucket
+    with _drive_write_bucket_lock:
+        if _drive_write_bucket is None:
+            _drive_write_bucket = TokenBucket(DRIVE_WRITE_RATE, DRIVE_WRITE_BURST)
+        return _drive_write_bucket
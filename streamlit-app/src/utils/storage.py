@@ -0,0 +1,188 @@
+# src/utils/storage.py
+
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# 'drive' (Google Drive, the default) or 'local' (SQLite database on this machine)
+STORAGE_BACKEND = os.getenv("PROGRESS_STORAGE", "drive").lower()
+
+
+class ProgressStorage(ABC):
+    """
+    Storage for user folders and progress files.
+
+    Files live in folders and are addressed by an opaque file ID; names are
+    resolved to IDs with get_file_id_by_name(). Content is bytes, and every
+    file has an MD5 checksum ('md5Checksum' in its metadata) so callers can
+    tell whether a local copy is current.
+
+    Operations on an ID that does not exist raise an error for which
+    is_not_found() is True.
+    """
+
+    # Folder that holds the user folders when no MAIN_PROGRESS_FOLDER_ID is configured
+    root_folder_id = None
+
+    @abstractmethod
+    def list_files_in_directory(self, folder_id):
+        """Return metadata dicts (id, name, mimeType) of everything in a folder."""
+
+    @abstractmethod
+    def get_file_id_by_name(self, folder_id, filename, mime_type=None):
+        """Return the ID of the oldest file named 'filename' in a folder, or None."""
+
+    @abstractmethod
+    def create_directory(self, name, parent_folder_id=None):
+        """Create a folder and return its ID."""
+
+    @abstractmethod
+    def upload_bytes(self, data, file_name, folder_id, mime_type='application/json', file_id=None):
+        """Create a file, or overwrite file 'file_id', and return its ID."""
+
+    @abstractmethod
+    def get_file_metadata(self, file_id, fields='id, name, md5Checksum, modifiedTime'):
+        """Return the metadata of a file without its content."""
+
+    @abstractmethod
+    def download_bytes(self, file_id):
+        """Return the content of a file."""
+
+    @abstractmethod
+    def delete_file(self, file_id):
+        """Delete a file."""
+
+    # Multi-file operations. Backends with a cheaper way to do several at once override these.
+
+    def get_file_ids_by_name(self, folder_id, filenames, mime_type=None):
+        """Return {name: file ID or None} for several names in one folder."""
+        return {name: self.get_file_id_by_name(folder_id, name, mime_type) for name in filenames}
+
+    def get_files_metadata(self, file_ids, fields='id, name, md5Checksum, modifiedTime'):
+        """Return {file ID: metadata}, with None for files that do not exist."""
+        metadata = {}
+        for file_id in file_ids:
+            try:
+                metadata[file_id] = self.get_file_metadata(file_id, fields)
+            except storage_errors() as e:
+                if not is_not_found(e):
+                    raise
+                metadata[file_id] = None
+        return metadata
+
+    def create_directories(self, names, parent_folder_id):
+        """Create several folders and return {name: folder ID}."""
+        return {name: self.create_directory(name, parent_folder_id) for name in names}
+
+    def delete_files(self, file_ids):
+        """Delete several files, ignoring the ones that no longer exist."""
+        for file_id in file_ids:
+            try:
+                self.delete_file(file_id)
+            except storage_errors() as e:
+                if not is_not_found(e):
+                    raise
+
+    def invalidate_file_id(self, folder_id, name):
+        """Forget any cached ID of 'name' in 'folder_id'. Backends without a cache ignore this."""
+
+    def find_folder(self, parent_folder_id, name):
+        """Return the ID of the folder 'name' in 'parent_folder_id', or None."""
+        return self.get_file_id_by_name(parent_folder_id, name, mime_type=FOLDER_MIME_TYPE)
+
+    def find_or_create_folder(self, parent_folder_id, name):
+        """
+        Return the ID of the folder 'name' in 'parent_folder_id', creating it if it
+        does not exist yet.
+
+        Creation is serialized within the process. Across processes, every
+        creator settles on the oldest folder of that name and removes its own
+        if it lost the race, so concurrent first visits never leave duplicates.
+
+        Returns:
+            tuple: (folder ID, True if this call created the folder)
+        """
+        with _folder_lock(parent_folder_id, name):
+            folder_id = self.find_folder(parent_folder_id, name)
+            if folder_id:
+                return folder_id, False
+            folder_id = self.create_directory(name, parent_folder_id)
+            self.invalidate_file_id(parent_folder_id, name)
+            oldest = self.find_folder(parent_folder_id, name)
+            if oldest and oldest != folder_id:
+                self.delete_file(folder_id)
+                return oldest, False
+            return folder_id, True
+
+
+def _http_error_class():
+    """
+    googleapiclient's HttpError, or None if the Drive client was never
+    imported (then no Drive error can exist). Looking it up instead of
+    importing it keeps the local backend free of the Google client stack.
+    """
+    errors = sys.modules.get('googleapiclient.errors')
+    return errors.HttpError if errors else None
+
+
+def is_not_found(error):
+    """True if 'error' means the requested file does not exist, for any backend."""
+    http_error = _http_error_class()
+    if http_error and isinstance(error, http_error):
+        return error.resp.status == 404
+    return isinstance(error, FileNotFoundError)
+
+
+# 403 reasons Drive uses for quota errors that go away by themselves
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+def is_transient(error):
+    """True if an operation that failed with 'error' may succeed when retried later."""
+    http_error = _http_error_class()
+    if http_error and isinstance(error, http_error):
+        status = error.resp.status
+        if status == 429 or status >= 500:
+            return True
+        if status == 403 and isinstance(error.error_details, list):
+            return any(isinstance(d, dict) and d.get('reason') in RATE_LIMIT_REASONS for d in error.error_details)
+        return False
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+_folder_locks = {}
+_folder_locks_lock = threading.Lock()
+
+
+def _folder_lock(parent_folder_id, name):
+    with _folder_locks_lock:
+        return _folder_locks.setdefault((parent_folder_id, name), threading.Lock())
+
+
+def storage_errors():
+    """Errors to catch around storage calls that may hit a stale file ID; filter them with is_not_found()."""
+    http_error = _http_error_class()
+    return (http_error, FileNotFoundError) if http_error else (FileNotFoundError,)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the process-wide storage backend selected by PROGRESS_STORAGE."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == 'local':
+                from utils.local_storage import LocalStorage
+                _storage = LocalStorage()
+            elif STORAGE_BACKEND == 'drive':
+                from utils.google_drive import get_drive_manager
+                _storage = get_drive_manager()
+            else:
+                raise ValueError(f"Unknown PROGRESS_STORAGE backend: {STORAGE_BACKEND}")
+        return _storage
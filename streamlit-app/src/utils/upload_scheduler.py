@@ -0,0 +1,225 @@
+# src/utils/upload_scheduler.py
+
+import atexit
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.storage import is_transient
+
+logger = logging.getLogger(__name__)
+
+
+class _UploadJob:
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.monotonic()
+
+    def run(self):
+        return self.fn(*self.args, **self.kwargs)
+
+
+class _Lane:
+    """Ordered queue for a single destination file. Holds at most one pending job."""
+
+    def __init__(self):
+        self.pending = None
+        self.running = False
+
+
+class UploadScheduler:
+    """
+    Shared background uploader with one ordered lane per destination
+    (e.g. per user folder and file name).
+
+    Jobs in the same lane run one after the other, never concurrently. A job
+    submitted while an older one is still waiting replaces it, since every
+    upload carries the full latest state of its file. Different lanes run in
+    parallel on a bounded pool of worker threads.
+
+    A job failing with a transient error (rate limits, 5xx, connection
+    problems) is retried with exponential backoff and full jitter, up to
+    'max_attempts' times. Retrying stops early if a newer job for the same
+    lane is waiting, since that job supersedes the failed one.
+    """
+
+    def __init__(self, max_workers=4, max_pending=256, max_attempts=6, base_delay=1.0, max_delay=60.0,
+                 is_retryable=is_transient):
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.is_retryable = is_retryable
+        self._closing = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload')
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._lanes = {}
+        self._pending = 0
+        self._stats = {
+            'submitted': 0,
+            'coalesced': 0,
+            'completed': 0,
+            'retries': 0,
+            'superseded': 0,
+            'dropped': 0,
+            'inline': 0,
+            'total_lag': 0.0,
+            'max_lag': 0.0,
+            'last_lag': 0.0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+        }
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Schedule fn(*args, **kwargs) on the lane 'key'.
+
+        If the scheduler already holds 'max_pending' waiting jobs and no lane
+        'key' is active, the job runs in the calling thread instead, so a
+        backlog slows down its producer rather than everyone else. A job for
+        an active lane always waits in that lane, keeping the lane's order.
+        """
+        job = _UploadJob(fn, args, kwargs)
+        with self._lock:
+            self._stats['submitted'] += 1
+            lane = self._lanes.get(key)
+            if lane is not None and lane.pending is not None:
+                # Only the newest snapshot of a file is worth uploading
+                lane.pending = job
+                self._stats['coalesced'] += 1
+                return
+            if lane is None and self._pending >= self.max_pending:
+                # A busy lane still takes the job: running it here could overtake the lane's worker
+                self._stats['inline'] += 1
+                run_inline = True
+            else:
+                run_inline = False
+                if lane is None:
+                    lane = self._lanes[key] = _Lane()
+                lane.pending = job
+                self._pending += 1
+                if not lane.running:
+                    lane.running = True
+                    self._executor.submit(self._drain, key)
+
+        if run_inline:
+            self._run(job)
+
+    def _drain(self, key):
+        """Run the jobs of one lane until it is empty."""
+        while True:
+            with self._lock:
+                lane = self._lanes[key]
+                job = lane.pending
+                if job is None:
+                    del self._lanes[key]
+                    self._idle.notify_all()
+                    return
+                lane.pending = None
+                self._pending -= 1
+                lag = time.monotonic() - job.enqueued_at
+                self._stats['total_lag'] += lag
+                self._stats['last_lag'] = lag
+                self._stats['max_lag'] = max(self._stats['max_lag'], lag)
+            self._run(job, key)
+
+    def _run(self, job, key=None):
+        attempt = 1
+        while True:
+            try:
+                job.run()
+            except Exception as e:
+                if attempt >= self.max_attempts or self._closing or not self.is_retryable(e):
+                    logger.exception("Background upload failed; giving up after %d attempt(s).", attempt)
+                    self._count('dropped')
+                    return
+                if key is not None and self._has_newer_job(key):
+                    logger.warning("Background upload failed (%s); a newer upload replaces it.", e)
+                    self._count('superseded')
+                    return
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                logger.warning("Background upload failed (%s); retrying in %.1fs.", e, delay)
+                self._count('retries')
+                time.sleep(delay)
+                attempt += 1
+            else:
+                latency = time.monotonic() - job.enqueued_at
+                with self._lock:
+                    self._stats['completed'] += 1
+                    self._stats['total_latency'] += latency
+                    self._stats['max_latency'] = max(self._stats['max_latency'], latency)
+                return
+
+    def _count(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _has_newer_job(self, key):
+        with self._lock:
+            lane = self._lanes.get(key)
+            return lane is not None and lane.pending is not None
+
+    def metrics(self):
+        """
+        Return a snapshot of the scheduler counters.
+
+        Returns:
+            dict: queue_depth (waiting jobs), active_lanes, and counters for submitted,
+                  coalesced, completed, retried, superseded, dropped and inline jobs,
+                  plus the average, maximum and last queueing lag and the average and
+                  maximum latency from submission to completion, in seconds.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queue_depth'] = self._pending
+            stats['active_lanes'] = len(self._lanes)
+        started = stats['submitted'] - stats['coalesced'] - stats['inline'] - stats['queue_depth']
+        stats['avg_lag'] = stats.pop('total_lag') / started if started > 0 else 0.0
+        completed = stats['completed']
+        stats['avg_latency'] = stats.pop('total_latency') / completed if completed else 0.0
+        return stats
+
+    def wait(self, key, timeout=None):
+        """
+        Block until the lane 'key' has no waiting or running job.
+        Returns False if 'timeout' seconds passed first.
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: key not in self._lanes, timeout=timeout)
+
+    def flush(self, timeout=None):
+        """
+        Block until every scheduled job has run.
+        Returns False if 'timeout' seconds passed first.
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._lanes, timeout=timeout)
+
+    def shutdown(self, timeout=None):
+        """
+        Flush pending uploads and stop the worker threads. Failing uploads are
+        not retried any more once the flush times out; their content stays
+        pending in the local progress cache.
+        """
+        self.flush(timeout)
+        self._closing = True
+        self._executor.shutdown(wait=True)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_upload_scheduler():
+    """Return the process-wide UploadScheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = UploadScheduler()
+            atexit.register(_scheduler.shutdown, 30)
+        return _scheduler
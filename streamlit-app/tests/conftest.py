@@ -0,0 +1,10 @@
+# tests/conftest.py
+
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# The app imports its modules relative to src (e.g. 'from utils.helpers import ...')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,76 @@
+# tests/test_answer_index.py
+
+import os
+import random
+import time
+
+import pandas as pd
+import pytest
+
+from utils.answer_index import AnswerIndex, parse_acceptable_answers
+from utils.helpers import compare_strings, expand_parentheses
+
+EXERCISE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'standard_exercises',
+                        'DutchEnglishFrequencySimplified.txt')
+
+
+def baseline_grade(user_input, answer_string, tolerance, ignore_accents):
+    """
+    How answers were graded before the answer index: each expansion compared
+    on its own. The double space expand_parentheses leaves for an optional
+    part inside an answer ("in  front") is collapsed, as the index does.
+    """
+    return any(
+        compare_strings(user_input, ' '.join(expanded.split()), tolerance, ignore_accents)[0]
+        for answer in parse_acceptable_answers(answer_string)
+        for expanded in expand_parentheses(answer)
+    )
+
+
+def with_typo(text, rng):
+    i = rng.randrange(len(text) + 1)
+    edit = rng.choice(('replace', 'drop', 'insert'))
+    if edit == 'replace':
+        return text[:i] + rng.choice('aeiounrst') + text[i + 1:]
+    if edit == 'drop':
+        return text[:i] + text[i + 1:]
+    return text[:i] + rng.choice('aeiounrst') + text[i:]
+
+
+@pytest.mark.parametrize('user_input, answer_string, correct', [
+    ('totem', '(to) them', True),
+    ('them', '(to) them', True),
+    ('to them', '(to) them', True),
+    ('house', '(to) them', False),
+])
+def test_similarity_grades_every_expansion(user_input, answer_string, correct):
+    assert AnswerIndex().grade(user_input, answer_string, 80, False)[0] == correct
+
+
+def test_similarity_grading_matches_baseline():
+    # expand_parentheses is only reliable for answers with at most one optional part
+    cells = pd.read_csv(EXERCISE, sep='\t', header=None, names=['Dutch', 'English'])['English'].dropna()
+    cells = [cell for cell in cells if all(answer.count('(') <= 1 for answer in parse_acceptable_answers(cell))]
+    # Answers with an optional part are where grading one expansion and grading all of them differ
+    cells += [cell for cell in cells if '(' in cell] * 5
+    rng = random.Random(0)
+    index = AnswerIndex()
+    for _ in range(5000):
+        cell = rng.choice(cells)
+        user_input = rng.choice([e for answer in parse_acceptable_answers(cell) for e in expand_parentheses(answer)])
+        for _ in range(rng.randrange(3)):
+            user_input = with_typo(user_input, rng)
+        tolerance = rng.choice((60, 70, 80, 90))
+        assert index.grade(user_input, cell, tolerance, False)[0] == baseline_grade(user_input, cell, tolerance, False), (
+            user_input, cell, tolerance
+        )
+
+
+def test_grading_is_not_exponential_in_optional_parts():
+    answer_string = ' '.join(f'w{i} (o{i})' for i in range(20))
+    user_input = ' '.join(f'w{i} o{i}' for i in range(20) if i % 3) + ' x'
+    index = AnswerIndex()
+    start = time.perf_counter()
+    for grader in ('similarity', 'edit_distance'):
+        index.grade(user_input, answer_string, 80, False, grader)
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,48 @@
+# tests/test_google_drive.py
+
+import threading
+
+import pytest
+
+from utils.google_drive import GoogleDriveManager
+
+
+class FakeRequest:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def execute(self, http=None):
+        if self.fail:
+            raise ConnectionError("connection reset")
+        return http
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # Skip __init__, which reads the service account from the Streamlit secrets
+    manager = GoogleDriveManager.__new__(GoogleDriveManager)
+    manager._idle_http = []
+    manager._http_lock = threading.Lock()
+    monkeypatch.setattr(manager, '_new_http', object)
+    return manager
+
+
+def test_http_clients_are_reused_across_threads(manager):
+    used = []
+    for _ in range(3):
+        thread = threading.Thread(target=lambda: used.append(manager._execute(FakeRequest())))
+        thread.start()
+        thread.join()
+    assert len(set(map(id, used))) == 1
+
+
+def test_concurrent_requests_get_their_own_client(manager):
+    with manager._http() as first, manager._http() as second:
+        assert first is not second
+    assert len(manager._idle_http) == 2
+
+
+def test_client_of_a_failed_request_is_dropped(manager):
+    with pytest.raises(ConnectionError):
+        manager._execute(FakeRequest(fail=True))
+    assert manager._idle_http == []
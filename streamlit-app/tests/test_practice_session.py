@@ -0,0 +1,57 @@
+# tests/test_practice_session.py
+
+import pandas as pd
+
+from sections.practice_session import PracticeSession
+
+DIRECTION = 'Dutch to English'
+
+
+def answer(session, word_pair, user_input, correct):
+    session.update_progress_practice(DIRECTION, word_pair['Dutch'], user_input, word_pair['English'], correct, word_pair)
+    if correct:
+        session.remove_from_mistakes(word_pair, DIRECTION)
+    else:
+        session.add_mistake(word_pair, DIRECTION)
+
+
+def test_regrade_updates_mistakes_in_one_snapshot():
+    df = pd.DataFrame({'Dutch': ['huis', 'boom', 'kat', 'hond'], 'English': ['house', 'tree', 'cat', 'dog']})
+    session = PracticeSession()
+    session.setup_new_exercise(df, 'Dutch', 'English', 'regrade')
+    huis, boom, kat, hond = (
+        next(pair for pair in session.original_word_list if pair['Dutch'] == word) for word in ('huis', 'boom', 'kat', 'hond')
+    )
+    # Verdicts the current settings disagree with: a right answer marked wrong and the other way round
+    answer(session, huis, 'house', False)
+    answer(session, boom, 'cat', True)
+    answer(session, kat, 'dog', False)
+    answer(session, hond, 'dog', True)
+    events = len(session.journal.events)
+
+    stats = session.regrade_answers()
+
+    assert stats == {'checked': 4, 'changed': 2, 'added': 1, 'removed': 1}
+    assert session.mistakes[DIRECTION] == [kat, boom]
+    assert session.get_set('mistakes', DIRECTION).word_list == session.mistakes[DIRECTION]
+    assert len(session.journal.events) == events
+    assert session.snapshot_required
+
+
+def test_context_answers_roll_up_per_word():
+    df = pd.DataFrame({'Dutch': ['huis', 'boom', 'kat'], 'English': ['house', 'tree', 'cat']})
+    session = PracticeSession()
+    session.setup_new_exercise(df, 'Dutch', 'English', 'context')
+    session.setup_context_sets()
+    for i in range(250):
+        word, translation = [('huis', 'house'), ('boom', 'tree'), ('kat', 'cat')][i % 3]
+        session.append_progress_entry('context', DIRECTION, {
+            'word': word, 'correct_translation': translation, 'correct': i % 2 == 0,
+        })
+
+    session._roll_up_set('context', DIRECTION)
+
+    word_stats = session.get_set('context', DIRECTION).word_stats
+    assert 'null' not in word_stats
+    assert len(word_stats) == 3
+    assert sum(stats['attempts'] for stats in word_stats.values()) == 150
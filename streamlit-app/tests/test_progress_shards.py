@@ -0,0 +1,118 @@
+# tests/test_progress_shards.py
+
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from sections.practice_session import PracticeSession
+from utils import progress_cache, progress_shards
+from utils.local_storage import LocalStorage
+from utils.progress_cache import ProgressCache, ProgressFileReader
+from utils.progress_journal import ProgressJournal, event_id, journal_filename_for, progress_filename
+from utils.upload_scheduler import get_upload_scheduler
+
+EXERCISE = 'shared'
+DIRECTION = 'Dutch to English'
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(progress_cache, '_cache', ProgressCache(str(tmp_path / 'progress_cache')))
+    # What the process knows about stored files is per database; start afresh for each test
+    for name in ('_pending_snapshots', '_landed_events', '_landed_lineage', '_landed_journals', '_remote_merges'):
+        monkeypatch.setattr(progress_shards, name, {})
+    return LocalStorage(str(tmp_path / 'progress.db'))
+
+
+def load_session(storage, folder_id):
+    reader = ProgressFileReader(storage, folder_id)
+    index_file = progress_filename(EXERCISE)
+    contents = reader.read_many([index_file, journal_filename_for(index_file)])
+    journal = contents[journal_filename_for(index_file)]
+    session = PracticeSession()
+    session.load_from_progress(
+        json.loads(contents[index_file]), journal_text=journal.decode('utf-8') if journal else '', shard_reader=reader
+    )
+    return session
+
+
+def answer(session, index):
+    word_pair = session.get_set('practice', DIRECTION).word_list[index]
+    session.update_progress_practice(DIRECTION, word_pair['Dutch'], 'wrong', word_pair['English'], False, word_pair)
+
+
+def stored_event_ids(storage, folder_id):
+    file_id = storage.get_file_id_by_name(folder_id, journal_filename_for(progress_filename(EXERCISE)))
+    _, events = ProgressJournal.parse(storage.download_bytes(file_id).decode('utf-8'))
+    return {event_id(event) for event in events}
+
+
+def two_sessions(storage, folder_id):
+    """Two sessions of one exercise, as when it is open in two browser tabs."""
+    df = pd.DataFrame({'Dutch': ['huis', 'boom', 'kat'], 'English': ['house', 'tree', 'cat']})
+    first = PracticeSession()
+    first.setup_new_exercise(df, 'Dutch', 'English', EXERCISE)
+    first.save_progress_data(storage, folder_id, async_save=False)
+    return first, load_session(storage, folder_id)
+
+
+def test_two_sessions_in_one_process_keep_each_others_journal_events(storage):
+    folder_id = storage.create_directory('user', storage.root_folder_id)
+    first, second = two_sessions(storage, folder_id)
+
+    answer(first, 0)
+    first.save_progress_data(storage, folder_id, async_save=False)
+    answer(second, 1)
+    second.save_progress_data(storage, folder_id, async_save=False)
+
+    expected = {event_id(event) for event in first.journal.events + second.journal.events}
+    assert expected <= stored_event_ids(storage, folder_id)
+
+
+def test_two_sessions_keep_each_others_events_when_their_uploads_coalesce(storage):
+    folder_id = storage.create_directory('user', storage.root_folder_id)
+    first, second = two_sessions(storage, folder_id)
+
+    # Hold the exercise's upload lane so both journals are staged before either is uploaded
+    scheduler = get_upload_scheduler()
+    key = (folder_id, progress_filename(EXERCISE))
+    release = threading.Event()
+    scheduler.submit(key, release.wait, 5)
+    try:
+        answer(first, 0)
+        first.save_progress_data(storage, folder_id)
+        answer(second, 1)
+        second.save_progress_data(storage, folder_id)
+    finally:
+        release.set()
+    assert scheduler.wait(key, 5)
+
+    expected = {event_id(event) for event in first.journal.events + second.journal.events}
+    assert expected <= stored_event_ids(storage, folder_id)
+
+
+def test_restarting_an_exercise_replaces_its_stored_progress(storage):
+    folder_id = storage.create_directory('user', storage.root_folder_id)
+    df = pd.DataFrame({'Dutch': ['huis', 'boom', 'kat', 'hond'], 'English': ['house', 'tree', 'cat', 'dog']})
+    session = PracticeSession()
+    session.setup_new_exercise(df, 'Dutch', 'English', EXERCISE)
+    session.save_progress_data(storage, folder_id, async_save=False)
+    for i in range(3):
+        answer(session, i)
+        session.save_progress_data(storage, folder_id, async_save=False)
+
+    # Selecting the same exercise again starts it over
+    session.setup_new_exercise(df, 'Dutch', 'English', EXERCISE)
+    session.save_progress_data(storage, folder_id, async_save=False)
+    word_list = list(session.get_set('practice', DIRECTION).word_list)
+    for i in range(2):
+        answer(session, i)
+        session.save_progress_data(storage, folder_id, async_save=False)
+
+    for restarted in (session, load_session(storage, folder_id)):
+        pset = restarted.get_set('practice', DIRECTION)
+        assert pset.num_answered == 2
+        assert pset.current_index == 2
+        assert pset.word_list == word_list
@@ -0,0 +1,62 @@
+# tests/test_upload_scheduler.py
+
+import threading
+
+from utils.upload_scheduler import UploadScheduler
+
+
+def test_saturated_scheduler_keeps_order_of_busy_lane():
+    scheduler = UploadScheduler(max_workers=2, max_pending=1)
+    release = threading.Event()
+    started = {'a': threading.Event(), 'b': threading.Event()}
+    order = []
+
+    def blocking(name, lane):
+        started[lane].set()
+        release.wait(5)
+        order.append(name)
+
+    try:
+        scheduler.submit('a', blocking, 'a1', 'a')
+        assert started['a'].wait(5)
+        scheduler.submit('b', blocking, 'b1', 'b')
+        assert started['b'].wait(5)
+        # Both workers are busy, so this job waits and the scheduler is saturated
+        scheduler.submit('c', order.append, 'c1')
+        assert scheduler.metrics()['queue_depth'] == 1
+
+        # Lane 'a' is running: the new job must queue behind it instead of running inline
+        scheduler.submit('a', order.append, 'a2')
+        assert scheduler.metrics()['inline'] == 0
+        assert 'a2' not in order
+
+        release.set()
+        assert scheduler.flush(5)
+        assert order.index('a1') < order.index('a2')
+    finally:
+        release.set()
+        scheduler.shutdown(5)
+
+
+def test_saturated_scheduler_runs_job_of_idle_lane_inline():
+    scheduler = UploadScheduler(max_workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+    order = []
+
+    def blocking(name):
+        started.set()
+        release.wait(5)
+        order.append(name)
+
+    try:
+        scheduler.submit('a', blocking, 'a1')
+        assert started.wait(5)
+        scheduler.submit('b', order.append, 'b1')
+
+        scheduler.submit('c', order.append, 'c1')
+        assert order == ['c1']
+        assert scheduler.metrics()['inline'] == 1
+    finally:
+        release.set()
+        scheduler.shutdown(5)